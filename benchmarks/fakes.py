@@ -0,0 +1,358 @@
+"""
+Local fakes for benchmarking: Reddit inbox, Venice API server and Redis.
+"""
+from typing import Any, Callable, Dict, List, Optional
+import asyncio
+import fnmatch
+import random
+import time
+from collections import Counter
+from aiohttp import web
+
+
+class FakeRedditItem:
+    """Inbox item with the attributes SimpiBot reads from asyncpraw items."""
+
+    def __init__(self,
+                 item_id: str,
+                 author: str,
+                 body: str,
+                 subreddit: str = 'test',
+                 category: Optional[str] = None):
+        self.id = item_id
+        self.author = author
+        self.body = body
+        self.subreddit = subreddit
+        self.category = category
+        self.created_at: Optional[float] = None
+        self.replied_at: Optional[float] = None
+        self.reply_text: Optional[str] = None
+
+    async def reply(self, body: str):
+        self.replied_at = time.monotonic()
+        self.reply_text = body
+
+    @property
+    def latency(self) -> Optional[float]:
+        """Seconds between entering the stream and being replied to."""
+        if self.created_at is None or self.replied_at is None:
+            return None
+        return self.replied_at - self.created_at
+
+
+class FakeInbox:
+    def __init__(self, items: List[FakeRedditItem], rate: Optional[float] = None):
+        self.items = items
+        self.rate = rate
+        self.exhausted = asyncio.Event()
+
+    async def stream(self, skip_existing: bool = True):
+        """Yield items at `rate` per second (or as fast as possible)."""
+        interval = 1.0 / self.rate if self.rate else 0
+        for item in self.items:
+            if interval:
+                await asyncio.sleep(interval)
+            item.created_at = time.monotonic()
+            yield item
+
+        self.exhausted.set()
+        # Like the real stream, never finish on our own
+        await asyncio.Event().wait()
+
+
+class FakeReddit:
+    def __init__(self, items: List[FakeRedditItem], rate: Optional[float] = None):
+        self.inbox = FakeInbox(items, rate)
+
+    async def close(self):
+        pass
+
+
+class FakeVeniceServer:
+    """OpenRouter-compatible chat completion server with fault injection."""
+
+    def __init__(self,
+                 latency: float = 0.2,
+                 jitter: float = 0.05,
+                 error_rate: float = 0.0,
+                 rate_limit_share: float = 0.5,
+                 seed: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_share = rate_limit_share
+        self.random = random.Random(seed)
+        self.stats: Counter = Counter()
+        self.url: Optional[str] = None
+        self._runner: Optional[web.AppRunner] = None
+
+    async def _handle_completion(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        self.stats['requests'] += 1
+
+        delay = max(0.0, self.random.gauss(self.latency, self.jitter))
+        await asyncio.sleep(delay)
+
+        if self.random.random() < self.error_rate:
+            if self.random.random() < self.rate_limit_share:
+                self.stats['rate_limited'] += 1
+                return web.json_response(
+                    {"error": {"message": "Rate limit exceeded"}},
+                    status=429,
+                    headers={"Retry-After": "1"}
+                )
+            self.stats['server_errors'] += 1
+            return web.json_response(
+                {"error": {"message": "Upstream error"}},
+                status=500
+            )
+
+        prompt = payload["messages"][-1]["content"]
+        return web.json_response({
+            "id": f"bench-{self.stats['requests']}",
+            "model": payload.get("model"),
+            "choices": [{
+                "index": 0,
+                "message": {
+                    "role": "assistant",
+                    "content": f"Thanks for asking! You said: {prompt[:80]}"
+                },
+                "finish_reason": "stop"
+            }]
+        })
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0):
+        app = web.Application()
+        app.router.add_post('/chat/completions', self._handle_completion)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.url = f"http://{host}:{port}"
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+
+class FakeRedis:
+    """In-process stand-in for the subset of redis.asyncio used by the bot."""
+
+    def __init__(self):
+        self.data: Dict[str, Any] = {}
+        self.expiry: Dict[str, float] = {}
+
+    def _expire_key(self, key: str):
+        deadline = self.expiry.get(key)
+        if deadline is not None and deadline <= time.time():
+            self.data.pop(key, None)
+            self.expiry.pop(key, None)
+
+    def _get(self, key: str, factory: Optional[Callable] = None):
+        self._expire_key(key)
+        if key not in self.data and factory is not None:
+            self.data[key] = factory()
+        return self.data.get(key)
+
+    async def ping(self) -> bool:
+        return True
+
+    async def get(self, key: str) -> Optional[str]:
+        return self._get(key)
+
+    async def mget(self, keys: List[str]) -> List[Optional[str]]:
+        return [await self.get(key) for key in keys]
+
+    async def set(self, key: str, value: Any, ex: Optional[int] = None) -> bool:
+        self.data[key] = str(value)
+        if ex:
+            self.expiry[key] = time.time() + ex
+        else:
+            self.expiry.pop(key, None)
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        removed = 0
+        for key in keys:
+            if self.data.pop(key, None) is not None:
+                removed += 1
+            self.expiry.pop(key, None)
+        return removed
+
+    async def expire(self, key: str, seconds: int) -> bool:
+        if self._get(key) is None:
+            return False
+        self.expiry[key] = time.time() + seconds
+        return True
+
+    async def keys(self, pattern: str = '*') -> List[str]:
+        for key in list(self.data):
+            self._expire_key(key)
+        return [key for key in self.data if fnmatch.fnmatchcase(key, pattern)]
+
+    async def scan_iter(self, match: str = '*', count: Optional[int] = None):
+        for key in await self.keys(match):
+            yield key
+
+    async def hget(self, key: str, field: str) -> Optional[str]:
+        return (self._get(key) or {}).get(field)
+
+    async def hgetall(self, key: str) -> Dict[str, str]:
+        return dict(self._get(key) or {})
+
+    async def hset(self, key: str, field: str = None, value: Any = None,
+                   mapping: Optional[Dict] = None) -> int:
+        h = self._get(key, dict)
+        items = dict(mapping or {})
+        if field is not None:
+            items[field] = value
+        added = sum(1 for f in items if f not in h)
+        h.update({f: str(v) for f, v in items.items()})
+        return added
+
+    async def hincrby(self, key: str, field: str, amount: int = 1) -> int:
+        h = self._get(key, dict)
+        value = int(h.get(field, 0)) + int(amount)
+        h[field] = str(value)
+        return value
+
+    async def hincrbyfloat(self, key: str, field: str, amount: float = 1.0) -> float:
+        h = self._get(key, dict)
+        value = float(h.get(field, 0)) + float(amount)
+        h[field] = repr(value)
+        return value
+
+    async def rpush(self, key: str, *values: Any) -> int:
+        lst = self._get(key, list)
+        lst.extend(str(v) for v in values)
+        return len(lst)
+
+    async def llen(self, key: str) -> int:
+        return len(self._get(key) or [])
+
+    async def lrange(self, key: str, start: int, end: int) -> List[str]:
+        lst = self._get(key) or []
+        # Redis ranges are inclusive and clamp out-of-range indexes
+        if start < 0:
+            start = max(len(lst) + start, 0)
+        if end < 0:
+            end = len(lst) + end
+        return lst[start:end + 1]
+
+    async def ltrim(self, key: str, start: int, end: int) -> bool:
+        lst = self._get(key)
+        if lst is not None:
+            trimmed = await self.lrange(key, start, end)
+            if trimmed:
+                self.data[key] = trimmed
+            else:
+                self.data.pop(key, None)
+        return True
+
+    async def zincrby(self, key: str, amount: float, member: str) -> float:
+        z = self._get(key, dict)
+        z[member] = z.get(member, 0.0) + float(amount)
+        return z[member]
+
+    async def zrem(self, key: str, *members: str) -> int:
+        z = self._get(key) or {}
+        return sum(1 for m in members if z.pop(m, None) is not None)
+
+    async def lmove(self, source: str, destination: str,
+                    src: str = 'LEFT', dest: str = 'RIGHT') -> Optional[str]:
+        lst = self._get(source)
+        if not lst:
+            return None
+        value = lst.pop(0 if src == 'LEFT' else -1)
+        if not lst:
+            self.data.pop(source, None)
+        target = self._get(destination, list)
+        if dest == 'LEFT':
+            target.insert(0, value)
+        else:
+            target.append(value)
+        return value
+
+    async def zadd(self, key: str, mapping: Dict[str, float]) -> int:
+        z = self._get(key, dict)
+        added = sum(1 for m in mapping if m not in z)
+        z.update({m: float(score) for m, score in mapping.items()})
+        return added
+
+    async def zrangebyscore(self, key: str, min: Any, max: Any) -> List[str]:
+        z = self._get(key) or {}
+        low, high = float(min), float(max)
+        return [m for m, s in sorted(z.items(), key=lambda kv: kv[1])
+                if low <= s <= high]
+
+    async def zremrangebyscore(self, key: str, min: Any, max: Any) -> int:
+        z = self._get(key) or {}
+        low, high = float(min), float(max)
+        removed = [m for m, s in z.items() if low <= s <= high]
+        for m in removed:
+            del z[m]
+        return len(removed)
+
+    async def zunionstore(self, dest: str, keys: List[str]) -> int:
+        union: Dict[str, float] = {}
+        for key in keys:
+            for m, score in (self._get(key) or {}).items():
+                union[m] = union.get(m, 0.0) + score
+        self.data[dest] = union
+        self.expiry.pop(dest, None)
+        return len(union)
+
+    async def zrevrange(self, key: str, start: int, end: int,
+                        withscores: bool = False) -> List:
+        z = self._get(key) or {}
+        ranked = sorted(z.items(), key=lambda kv: kv[1], reverse=True)
+        ranked = ranked[start:None if end == -1 else end + 1]
+        return ranked if withscores else [m for m, _ in ranked]
+
+    async def info(self, section: Optional[str] = None) -> Dict[str, Any]:
+        return {'used_memory': None, 'db0': {'keys': len(self.data)}}
+
+    def pipeline(self, transaction: bool = True) -> 'FakePipeline':
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    """Buffers commands and runs them on execute(), like a redis.asyncio pipeline."""
+
+    def __init__(self, redis: FakeRedis):
+        self.redis = redis
+        self.calls: List = []
+
+    def __getattr__(self, name: str):
+        method = getattr(self.redis, name)
+
+        def buffered(*args, **kwargs):
+            self.calls.append((method, args, kwargs))
+            return self
+        return buffered
+
+    async def execute(self) -> List[Any]:
+        calls, self.calls = self.calls, []
+        return [await method(*args, **kwargs) for method, args, kwargs in calls]
+
+
+class CountingRedis:
+    """Proxy that counts every Redis command issued through it."""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands: Counter = Counter()
+
+    def __getattr__(self, name: str):
+        attr = getattr(self.redis, name)
+        if not callable(attr):
+            return attr
+
+        def counted(*args, **kwargs):
+            self.commands[name] += 1
+            return attr(*args, **kwargs)
+        return counted
+
+    def reset(self):
+        self.commands.clear()
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark for the Simpi pipeline.
+
+Runs SimpiBot (moderation, plugin routing, memory context, model reply and
+analytics) against a fake Reddit inbox, a fake Venice server and Redis,
+then compares the results with a stored baseline.
+
+Usage:
+    python -m benchmarks.run --scenario steady
+    python -m benchmarks.run --scenario steady --save-baseline
+    python -m benchmarks.run --scenario degraded --redis-url redis://localhost:6379/15
+"""
+from typing import Dict, List, Optional
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, replace
+import structlog
+from benchmarks.fakes import (
+    CountingRedis,
+    FakeReddit,
+    FakeRedditItem,
+    FakeRedis,
+    FakeVeniceServer
+)
+from bot.bot import SimpiBot
+from config.settings import (
+    DatabaseSettings,
+    RedditSettings,
+    Settings,
+    VeniceSettings,
+    WebhookSettings
+)
+from utils.redis_client import init_redis_pool
+from utils.venice import VeniceClient
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+
+# Metric -> (direction, allowed relative change before the run fails)
+REGRESSION_CHECKS = {
+    'throughput': ('higher', 0.15),
+    'latency_p50': ('lower', 0.20),
+    'latency_p95': ('lower', 0.25),
+    'latency_p99': ('lower', 0.35),
+    'crisis_latency_p99': ('lower', 0.50),
+    'redis_commands_per_item': ('lower', 0.05),
+    'memory_growth_kb_per_item': ('lower', 0.50),
+}
+
+MESSAGE_TEMPLATES = {
+    'general': [
+        "What's a good book to read on a long flight?",
+        "Any tips for staying motivated at the gym?",
+        "What is the best pizza topping and why is it pineapple?",
+        "Which board games are fun with a group of six?",
+    ],
+    'learn_programming': [
+        "How do I reverse a list in python without using reversed()?",
+        "I keep getting an error in javascript: TypeError: undefined is not a function",
+        "What is the difference between a class and an object in java?",
+        "Is it worth learning an algorithm book before LeetCode?",
+    ],
+    'relationships': [
+        "My partner and I keep arguing about chores, what should I do?",
+        "How do I tell my girlfriend I need more alone time?",
+        "Is it normal to feel nervous before a first dating app meetup?",
+    ],
+    'crisis': [
+        "My boyfriend hurt me last night and I don't know what to do",
+        "I can't take my partner's abuse anymore",
+    ],
+}
+
+
+@dataclass
+class Scenario:
+    messages: int = 2000
+    users: int = 700
+    workers: int = 8
+    rate: Optional[float] = None
+    model_latency: float = 0.2
+    model_jitter: float = 0.05
+    error_rate: float = 0.0
+    mix: Dict[str, float] = None
+    seed: int = 1234
+
+
+SCENARIOS = {
+    'steady': Scenario(
+        mix={
+            'general': 0.5,
+            'learn_programming': 0.3,
+            'relationships': 0.18,
+            'crisis': 0.02
+        }
+    ),
+    'degraded': Scenario(
+        messages=1000,
+        model_latency=0.8,
+        model_jitter=0.3,
+        error_rate=0.05,
+        mix={
+            'general': 0.69,
+            'learn_programming': 0.2,
+            'relationships': 0.1,
+            'crisis': 0.01
+        }
+    ),
+    'burst': Scenario(
+        messages=5000,
+        users=2000,
+        workers=16,
+        model_latency=0.05,
+        model_jitter=0.01,
+        mix={'general': 0.4, 'learn_programming': 0.4, 'relationships': 0.2}
+    ),
+}
+
+
+def generate_items(scenario: Scenario) -> List[FakeRedditItem]:
+    """Generate a deterministic inbox for a scenario."""
+    rng = random.Random(scenario.seed)
+    categories = list(scenario.mix)
+    weights = [scenario.mix[c] for c in categories]
+
+    items = []
+    for i in range(scenario.messages):
+        category = rng.choices(categories, weights)[0]
+        body = rng.choice(MESSAGE_TEMPLATES[category])
+        items.append(FakeRedditItem(
+            item_id=f"t1_{i:07d}",
+            author=f"user{rng.randrange(scenario.users)}",
+            body=f"{body} ({i})",
+            category=category
+        ))
+    return items
+
+
+def bench_settings(scenario: Scenario,
+                   redis_url: str,
+                   spool_path: Optional[str] = None) -> Settings:
+    return Settings(
+        reddit=RedditSettings('', '', '', ''),
+        venice=VeniceSettings(api_key='bench'),
+        database=DatabaseSettings(redis_url=redis_url),
+        webhooks=WebhookSettings(),
+        worker_count=scenario.workers,
+        queue_size=scenario.messages,
+        spool_path=spool_path
+    )
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def redis_memory(redis) -> Optional[int]:
+    try:
+        info = await redis.info('memory')
+        return info.get('used_memory')
+    except Exception:
+        return None
+
+
+async def run_benchmark(scenario: Scenario,
+                        redis_url: Optional[str] = None) -> Dict[str, float]:
+    """Run one scenario end to end and collect metrics."""
+    server = FakeVeniceServer(
+        latency=scenario.model_latency,
+        jitter=scenario.model_jitter,
+        error_rate=scenario.error_rate,
+        seed=scenario.seed
+    )
+    await server.start()
+
+    if redis_url:
+        redis = CountingRedis(await init_redis_pool(redis_url))
+    else:
+        redis = CountingRedis(FakeRedis())
+
+    items = generate_items(scenario)
+    reddit = FakeReddit(items, scenario.rate)
+    model = VeniceClient(api_key='bench', base_url=server.url, timeout=30)
+    spool_dir = tempfile.TemporaryDirectory()
+    bot = SimpiBot(
+        bench_settings(
+            scenario,
+            redis_url or 'fake://',
+            os.path.join(spool_dir.name, 'bench.spool')
+        ),
+        redis,
+        reddit=reddit,
+        model=model
+    )
+
+    tracemalloc.start()
+    redis_memory_before = await redis_memory(redis.redis)
+    memory_before, _ = tracemalloc.get_traced_memory()
+    redis.reset()
+
+    started = time.monotonic()
+    await bot.start()
+    await reddit.inbox.exhausted.wait()
+    await bot.queue.join()
+    await bot.crisis_queue.join()
+    elapsed = time.monotonic() - started
+
+    memory_after, memory_peak = tracemalloc.get_traced_memory()
+    redis_memory_after = await redis_memory(redis.redis)
+    tracemalloc.stop()
+
+    commands = dict(redis.commands)
+    await bot.shutdown()
+    await server.stop()
+    spool_dir.cleanup()
+
+    latencies = sorted(i.latency for i in items if i.latency is not None)
+    crisis_latencies = sorted(
+        i.latency for i in items
+        if i.category == 'crisis' and i.latency is not None
+    )
+    replied = len(latencies)
+    memory_growth_kb = (memory_after - memory_before) / 1024
+
+    results = {
+        'items': len(items),
+        'replied': replied,
+        'dropped': len(items) - replied,
+        'elapsed_s': elapsed,
+        'throughput': replied / elapsed if elapsed else 0.0,
+        'latency_mean': statistics.fmean(latencies) if latencies else 0.0,
+        'latency_p50': percentile(latencies, 50),
+        'latency_p95': percentile(latencies, 95),
+        'latency_p99': percentile(latencies, 99),
+        'latency_max': latencies[-1] if latencies else 0.0,
+        'crisis_replied': len(crisis_latencies),
+        'crisis_latency_p50': percentile(crisis_latencies, 50),
+        'crisis_latency_p99': percentile(crisis_latencies, 99),
+        'model_requests': server.stats['requests'],
+        'model_rate_limited': server.stats['rate_limited'],
+        'model_server_errors': server.stats['server_errors'],
+        'model_limit': bot.model_limiter.current_limit,
+        'model_shed': bot.model_limiter.shed,
+        'redis_commands': sum(commands.values()),
+        'redis_commands_per_item': sum(commands.values()) / len(items),
+        'memory_growth_kb': memory_growth_kb,
+        'memory_growth_kb_per_item': memory_growth_kb / len(items),
+        'memory_peak_kb': memory_peak / 1024,
+    }
+    if redis_memory_before is not None and redis_memory_after is not None:
+        results['redis_memory_growth_kb'] = (
+            redis_memory_after - redis_memory_before
+        ) / 1024
+    results['redis_command_counts'] = commands
+    return results
+
+
+def compare(results: Dict, baseline: Dict) -> List[str]:
+    """Return a description of every metric that regressed."""
+    regressions = []
+    for metric, (direction, tolerance) in REGRESSION_CHECKS.items():
+        if metric not in baseline or metric not in results:
+            continue
+        expected = baseline[metric]
+        actual = results[metric]
+        if direction == 'higher':
+            limit = expected * (1 - tolerance)
+            failed = actual < limit
+        else:
+            limit = expected * (1 + tolerance)
+            # Ignore noise on metrics that are effectively zero
+            failed = actual > limit and actual - expected > 1e-3
+        if failed:
+            regressions.append(
+                f"{metric}: {actual:.4f} vs baseline {expected:.4f} "
+                f"(limit {limit:.4f})"
+            )
+    return regressions
+
+
+def print_report(name: str, results: Dict):
+    print(f"\n== {name} ==")
+    for key, value in results.items():
+        if key == 'redis_command_counts':
+            continue
+        if isinstance(value, float):
+            print(f"  {key:<28} {value:12.4f}")
+        else:
+            print(f"  {key:<28} {value:12}")
+    print("  redis commands:")
+    for command, count in sorted(results['redis_command_counts'].items()):
+        print(f"    {command:<26} {count:12}")
+
+
+def baseline_path(name: str) -> str:
+    return os.path.join(BASELINE_DIR, f"{name}.json")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--scenario', choices=sorted(SCENARIOS), default='steady')
+    parser.add_argument('--messages', type=int)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--rate', type=float, help='Inbox items per second')
+    parser.add_argument('--model-latency', type=float)
+    parser.add_argument('--error-rate', type=float)
+    parser.add_argument(
+        '--redis-url',
+        help='Use a real Redis (point it at a scratch database); '
+             'defaults to the in-process fake'
+    )
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--log-level', default='ERROR')
+    args = parser.parse_args(argv)
+
+    structlog.configure(
+        wrapper_class=structlog.make_filtering_bound_logger(
+            getattr(logging, args.log_level.upper(), logging.ERROR)
+        )
+    )
+
+    scenario = SCENARIOS[args.scenario]
+    overrides = {
+        'messages': args.messages,
+        'workers': args.workers,
+        'rate': args.rate,
+        'model_latency': args.model_latency,
+        'error_rate': args.error_rate,
+    }
+    overrides = {k: v for k, v in overrides.items() if v is not None}
+    scenario = replace(scenario, **overrides)
+
+    results = asyncio.run(run_benchmark(scenario, args.redis_url))
+    print_report(args.scenario, results)
+
+    path = baseline_path(args.scenario)
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(
+                {'scenario': asdict(scenario), **results},
+                f,
+                indent=2,
+                sort_keys=True
+            )
+        print(f"\nBaseline saved to {path}")
+        return 0
+
+    if not os.path.exists(path):
+        print(f"\nNo baseline at {path}; run with --save-baseline to create one")
+        return 0
+
+    with open(path) as f:
+        baseline = json.load(f)
+    if baseline.get('scenario') != asdict(scenario):
+        print("\nScenario differs from the baseline; skipping comparison")
+        return 0
+
+    regressions = compare(results, baseline)
+    if regressions:
+        print("\nRegressions against baseline:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+
+    print("\nNo regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,22 @@
 """
 Analytics and metrics tracking system.
 """
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
 import time
 from datetime import datetime, timedelta
 import asyncio
 import json
 import structlog
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from bot.message import Message
+from bot.rollups import RollupEngine
+from utils.spool import Spool
 
 logger = structlog.get_logger()
 
-dataclass
+SPOOL_STREAM = 'analytics'
+
+@dataclass
 class Interaction:
     timestamp: float
     user_id: str
@@ -19,41 +24,74 @@ class Interaction:
     response: str
     response_time: float
     upvotes: int = 0
-    sentiment_score: float = 0.0
+    # None when the message was never scored (e.g. the crisis lane)
+    sentiment_score: Optional[float] = None
+    topics: List[str] = field(default_factory=list)
+    plugin: Optional[str] = None
+    subreddit: Optional[str] = None
 
 class AnalyticsEngine:
-    def __init__(self, redis_pool):
+    def __init__(self, redis_pool, spool: Optional[Spool] = None):
         self.redis = redis_pool
+        self.spool = spool
         self.current_interactions: List[Interaction] = []
         self.trending_topics: Dict[str, int] = {}
+        self.rollups = RollupEngine(redis_pool)
+        
+        # Unflushed interactions are kept in the local spool until they
+        # reach Redis, so a crash between flushes loses nothing
+        self._spool_ids: List[int] = []
+        if spool is not None:
+            for record_id, data in spool.pending_for(SPOOL_STREAM):
+                self.current_interactions.append(Interaction(**data))
+                self._spool_ids.append(record_id)
         
         # Start background tasks
         self.tasks = [
             asyncio.create_task(self._persist_metrics()),
-            asyncio.create_task(self._analyze_trends())
+            asyncio.create_task(self._analyze_trends()),
+            asyncio.create_task(self.rollups.run())
         ]
         
     async def log_interaction(self, 
                             user_id: str, 
-                            prompt: str, 
+                            prompt: Union[str, Message], 
                             response: str, 
-                            response_time: Optional[float] = None):
+                            response_time: Optional[float] = None,
+                            sentiment_score: Optional[float] = None,
+                            plugin: Optional[str] = None):
         """Log a single bot interaction."""
+        message = Message.coerce(prompt)
         interaction = Interaction(
             timestamp=time.time(),
             user_id=user_id,
-            prompt=prompt,
+            prompt=message.text,
             response=response,
-            response_time=response_time or 0.0
+            response_time=response_time or 0.0,
+            sentiment_score=sentiment_score,
+            topics=message.topics,
+            plugin=plugin,
+            subreddit=message.subreddit
         )
         
         self.current_interactions.append(interaction)
+        if self.spool is not None:
+            self._spool_ids.append(
+                self.spool.append(SPOOL_STREAM, vars(interaction))
+            )
+        self.rollups.record(
+            interaction.timestamp,
+            interaction.response_time,
+            sentiment_score=interaction.sentiment_score,
+            plugin=interaction.plugin,
+            subreddit=interaction.subreddit
+        )
         await self._update_metrics(interaction)
         
     async def _update_metrics(self, interaction: Interaction):
         """Update real-time metrics."""
         # Update response time metrics
-        await self.redis.hincrby(
+        await self.redis.hincrbyfloat(
             'metrics:response_times',
             interaction.user_id,
             interaction.response_time
@@ -66,22 +104,36 @@ class AnalyticsEngine:
             1
         )
         
+    async def flush(self):
+        """Write buffered interactions and rollup counters to Redis."""
+        await self.rollups.flush()
+        if not self.current_interactions:
+            return
+        
+        batch, self.current_interactions = self.current_interactions, []
+        spool_ids, self._spool_ids = self._spool_ids, []
+        try:
+            # Batch write interactions
+            await self.redis.rpush(
+                'analytics:interactions',
+                *[json.dumps(vars(i)) for i in batch]
+            )
+        except BaseException:
+            # Keep the batch (ahead of anything logged meanwhile) for the
+            # next attempt
+            self.current_interactions[:0] = batch
+            self._spool_ids[:0] = spool_ids
+            raise
+        
+        if self.spool is not None:
+            for record_id in spool_ids:
+                self.spool.ack(record_id)
+        
     async def _persist_metrics(self):
         """Periodically persist metrics to storage."""
         while True:
             try:
-                if self.current_interactions:
-                    # Batch write interactions
-                    await self.redis.rpush(
-                        'analytics:interactions',
-                        *[
-                            json.dumps(vars(i)) 
-                            for i in self.current_interactions
-                        ]
-                    )
-                    
-                    self.current_interactions.clear()
-                    
+                await self.flush()
                 await asyncio.sleep(300)  # 5 minutes
                 
             except Exception as e:
@@ -102,11 +154,13 @@ class AnalyticsEngine:
                 topics = {}
                 for raw in raw_interactions:
                     interaction = json.loads(raw)
-                    # Simple word frequency analysis
-                    words = interaction['prompt'].lower().split()
+                    # Simple word frequency analysis over the topics
+                    # extracted when the message was ingested
+                    words = interaction.get('topics')
+                    if words is None:
+                        words = Message(interaction['prompt']).topics
                     for word in words:
-                        if len(word) > 3:  # Skip short words
-                            topics[word] = topics.get(word, 0) + 1
+                        topics[word] = topics.get(word, 0) + 1
                             
                 # Update trending topics
                 self.trending_topics = dict(
@@ -139,6 +193,20 @@ class AnalyticsEngine:
             'interaction_count': int(interaction_count or 0)
         }
         
+    async def get_metrics(self,
+                          start: float,
+                          end: Optional[float] = None,
+                          resolution: Optional[str] = None) -> Dict:
+        """Aggregated metrics for a time range, read from rollup buckets."""
+        return await self.rollups.summary(start, end or time.time(), resolution)
+        
+    async def get_metrics_series(self,
+                                 start: float,
+                                 end: Optional[float] = None,
+                                 resolution: Optional[str] = None) -> List[Dict]:
+        """Per-bucket metrics for a time range (minute, hour or day buckets)."""
+        return await self.rollups.series(start, end or time.time(), resolution)
+        
     async def get_trending_topics(self) -> Dict[str, int]:
         """Get current trending topics."""
         return self.trending_topics
@@ -0,0 +1,375 @@
+"""
+Cold-storage archival of interaction history and FAQs into PostgreSQL.
+
+Redis keeps only the recent data the bot needs to reply. A background job
+moves everything older into monthly partitioned Postgres tables with COPY
+and trims the Redis lists, and ArchiveStore answers historical queries.
+"""
+from typing import Any, Dict, List, Optional, Set, Tuple
+import asyncio
+import json
+from datetime import datetime, timezone
+import asyncpg
+import structlog
+
+logger = structlog.get_logger()
+
+INTERACTION_COLUMNS = [
+    'ts', 'user_id', 'source', 'plugin', 'prompt', 'response',
+    'response_time', 'sentiment_score', 'topics', 'payload'
+]
+FAQ_COLUMNS = ['created_at', 'user_id', 'question', 'answer', 'uses']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS archived_interactions (
+    ts timestamptz NOT NULL,
+    user_id text NOT NULL,
+    source text NOT NULL,
+    plugin text,
+    prompt text,
+    response text,
+    response_time double precision,
+    sentiment_score double precision,
+    topics text[],
+    payload jsonb
+) PARTITION BY RANGE (ts);
+
+CREATE INDEX IF NOT EXISTS archived_interactions_user_ts
+    ON archived_interactions (user_id, ts);
+
+CREATE TABLE IF NOT EXISTS archived_faqs (
+    created_at timestamptz NOT NULL,
+    user_id text NOT NULL,
+    question text,
+    answer text,
+    uses integer
+) PARTITION BY RANGE (created_at);
+
+CREATE INDEX IF NOT EXISTS archived_faqs_user
+    ON archived_faqs (user_id, created_at);
+"""
+
+
+def _month_start(ts: datetime) -> datetime:
+    return ts.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _next_month(month: datetime) -> datetime:
+    if month.month == 12:
+        return month.replace(year=month.year + 1, month=1)
+    return month.replace(month=month.month + 1)
+
+
+def _to_datetime(timestamp: Optional[float]) -> datetime:
+    if timestamp is None:
+        return datetime.now(timezone.utc)
+    return datetime.fromtimestamp(float(timestamp), timezone.utc)
+
+
+class ArchiveStore:
+    """Postgres side of the archive: bulk loading and historical queries."""
+
+    def __init__(self, postgres_url: str):
+        self.postgres_url = postgres_url
+        self.pool: Optional[asyncpg.Pool] = None
+        self._partitions: Set[str] = set()
+
+    async def connect(self):
+        """Create the connection pool and the parent tables."""
+        pool = await asyncpg.create_pool(
+            self.postgres_url,
+            min_size=1,
+            max_size=4
+        )
+        try:
+            async with pool.acquire() as conn:
+                await conn.execute(SCHEMA)
+        except BaseException:
+            await pool.close()
+            raise
+        self.pool = pool
+        logger.info("Archive store connected")
+
+    async def close(self):
+        if self.pool is not None:
+            await self.pool.close()
+
+    async def _ensure_partition(self, conn, table: str, month: datetime) -> str:
+        """Create the monthly partition for `month` if it does not exist."""
+        name = f"{table}_{month:%Y%m}"
+        if name not in self._partitions:
+            await conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{month.isoformat()}') "
+                f"TO ('{_next_month(month).isoformat()}')"
+            )
+        return name
+
+    async def _copy(self,
+                    table: str,
+                    columns: List[str],
+                    records: List[Tuple]) -> int:
+        """COPY records into a partitioned table, creating partitions first."""
+        if not records:
+            return 0
+        months = {_month_start(record[0]) for record in records}
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                partitions = [
+                    await self._ensure_partition(conn, table, month)
+                    for month in sorted(months)
+                ]
+                await conn.copy_records_to_table(
+                    table,
+                    records=records,
+                    columns=columns
+                )
+        # Only remember partitions once the DDL has been committed
+        self._partitions.update(partitions)
+        return len(records)
+
+    async def copy_interactions(self, records: List[Tuple]) -> int:
+        return await self._copy(
+            'archived_interactions', INTERACTION_COLUMNS, records
+        )
+
+    async def copy_faqs(self, records: List[Tuple]) -> int:
+        return await self._copy('archived_faqs', FAQ_COLUMNS, records)
+
+    async def user_history(self,
+                           user_id: str,
+                           start: Optional[datetime] = None,
+                           end: Optional[datetime] = None,
+                           limit: int = 100) -> List[Dict]:
+        """Get archived interactions for a user, newest first."""
+        rows = await self.pool.fetch(
+            """
+            SELECT ts, plugin, prompt, response, response_time, sentiment_score
+            FROM archived_interactions
+            WHERE user_id = $1
+              AND source = 'memory'
+              AND ($2::timestamptz IS NULL OR ts >= $2)
+              AND ($3::timestamptz IS NULL OR ts < $3)
+            ORDER BY ts DESC
+            LIMIT $4
+            """,
+            user_id, start, end, limit
+        )
+        return [dict(row) for row in rows]
+
+    async def interaction_counts(self,
+                                 start: datetime,
+                                 end: datetime,
+                                 bucket: str = 'day') -> List[Dict]:
+        """Interaction count, mean latency and sentiment per time bucket."""
+        if bucket not in ('hour', 'day', 'week', 'month'):
+            raise ValueError(f"Unsupported bucket: {bucket}")
+        rows = await self.pool.fetch(
+            """
+            SELECT date_trunc($1, ts) AS bucket,
+                   count(*) AS interactions,
+                   count(DISTINCT user_id) AS users,
+                   avg(response_time) AS avg_response_time,
+                   avg(sentiment_score) AS avg_sentiment
+            FROM archived_interactions
+            WHERE source = 'analytics' AND ts >= $2 AND ts < $3
+            GROUP BY 1
+            ORDER BY 1
+            """,
+            bucket, start, end
+        )
+        return [dict(row) for row in rows]
+
+    async def top_topics(self,
+                         start: datetime,
+                         end: datetime,
+                         limit: int = 10) -> List[Tuple[str, int]]:
+        """Most frequent topics in a time range."""
+        rows = await self.pool.fetch(
+            """
+            SELECT topic, count(*) AS mentions
+            FROM archived_interactions, unnest(topics) AS topic
+            WHERE source = 'analytics' AND ts >= $1 AND ts < $2
+            GROUP BY topic
+            ORDER BY mentions DESC
+            LIMIT $3
+            """,
+            start, end, limit
+        )
+        return [(row['topic'], row['mentions']) for row in rows]
+
+    async def user_faqs(self, user_id: str) -> List[Dict]:
+        """Get a user's archived FAQs, newest first."""
+        rows = await self.pool.fetch(
+            """
+            SELECT created_at, question, answer, uses
+            FROM archived_faqs
+            WHERE user_id = $1
+            ORDER BY created_at DESC
+            """,
+            user_id
+        )
+        return [dict(row) for row in rows]
+
+
+class ArchiveJob:
+    """Background job that moves old Redis history into the archive store."""
+
+    def __init__(self,
+                 redis_pool,
+                 store: ArchiveStore,
+                 interval: int = 3600,
+                 analytics_keep: int = 1000,
+                 interactions_keep: int = 20,
+                 faqs_keep: int = 50,
+                 batch_size: int = 5000):
+        """
+        Args:
+            redis_pool: Redis connection pool
+            store: Postgres archive store
+            interval: Seconds between archive runs
+            analytics_keep: Newest entries kept in analytics:interactions
+                (trend analysis reads the last 1000)
+            interactions_keep: Newest entries kept per interactions:<user>
+            faqs_keep: Newest FAQs kept per faqs:<user>
+            batch_size: Maximum entries copied per COPY
+        """
+        self.redis = redis_pool
+        self.store = store
+        self.interval = interval
+        self.analytics_keep = analytics_keep
+        self.interactions_keep = interactions_keep
+        self.faqs_keep = faqs_keep
+        self.batch_size = batch_size
+
+    async def run(self):
+        """Archive periodically until cancelled.
+
+        Connects to Postgres here rather than at startup, so an unreachable
+        database delays archiving instead of stopping the bot.
+        """
+        while True:
+            try:
+                if self.store.pool is None:
+                    await self.store.connect()
+                await self.archive_once()
+                await asyncio.sleep(self.interval)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Error archiving history", error=str(e))
+                await asyncio.sleep(300)
+
+    async def archive_once(self) -> Dict[str, int]:
+        """Run one archive pass and return the number of entries moved."""
+        counts = {
+            'analytics': await self._drain(
+                'analytics:interactions',
+                self.analytics_keep,
+                self._analytics_record,
+                self.store.copy_interactions
+            ),
+            'interactions': 0,
+            'faqs': 0,
+        }
+        async for key in self.redis.scan_iter(match='interactions:*'):
+            counts['interactions'] += await self._drain(
+                key,
+                self.interactions_keep,
+                self._memory_record,
+                self.store.copy_interactions
+            )
+        async for key in self.redis.scan_iter(match='faqs:*'):
+            counts['faqs'] += await self._drain(
+                key,
+                self.faqs_keep,
+                self._faq_record,
+                self.store.copy_faqs
+            )
+        logger.info("Archive pass complete", **counts)
+        return counts
+
+    async def _drain(self, key: str, keep: int, to_record, copy) -> int:
+        """Move all but the newest `keep` entries of a list into Postgres.
+
+        Each batch is first moved from the head of the list into a staging
+        list with LMOVE inside one MULTI/EXEC. Concurrent pushes and trims
+        therefore cannot change which entries are removed. The staging
+        list is deleted only after the COPY commits, and a staging list
+        left over from an interrupted pass is archived first. A crash can
+        archive a batch twice, but never loses it.
+        """
+        staging = f'archive:staging:{key}'
+        moved = await self._copy_staged(key, staging, to_record, copy)
+        while True:
+            excess = await self.redis.llen(key) - keep
+            if excess <= 0:
+                break
+            pipe = self.redis.pipeline(transaction=True)
+            for _ in range(min(excess, self.batch_size)):
+                pipe.lmove(key, staging, 'LEFT', 'RIGHT')
+            await pipe.execute()
+            moved += await self._copy_staged(key, staging, to_record, copy)
+        return moved
+
+    async def _copy_staged(self, key: str, staging: str, to_record, copy) -> int:
+        """COPY a staging list into Postgres, then delete it."""
+        raw_entries = await self.redis.lrange(staging, 0, -1)
+        if not raw_entries:
+            return 0
+
+        records = []
+        for raw in raw_entries:
+            try:
+                records.append(to_record(key, json.loads(raw)))
+            except (ValueError, TypeError, KeyError) as e:
+                logger.warning(
+                    "Skipping malformed entry",
+                    key=key,
+                    error=str(e)
+                )
+        await copy(records)
+        await self.redis.delete(staging)
+        return len(raw_entries)
+
+    @staticmethod
+    def _analytics_record(key: str, data: Dict[str, Any]) -> Tuple:
+        """Map an AnalyticsEngine Interaction to an archive row."""
+        return (
+            _to_datetime(data.get('timestamp')),
+            data['user_id'],
+            'analytics',
+            data.get('plugin'),
+            data.get('prompt'),
+            data.get('response'),
+            data.get('response_time'),
+            data.get('sentiment_score'),
+            data.get('topics'),
+            json.dumps(data),
+        )
+
+    @staticmethod
+    def _memory_record(key: str, data: Dict[str, Any]) -> Tuple:
+        """Map a MemoryManager interaction to an archive row."""
+        return (
+            _to_datetime(data.get('timestamp')),
+            key.split(':', 1)[1],
+            'memory',
+            data.get('plugin'),
+            data.get('prompt'),
+            data.get('response'),
+            data.get('response_time'),
+            data.get('sentiment_score'),
+            data.get('topics'),
+            json.dumps(data),
+        )
+
+    @staticmethod
+    def _faq_record(key: str, data: Dict[str, Any]) -> Tuple:
+        return (
+            _to_datetime(data.get('created_at')),
+            key.split(':', 1)[1],
+            data.get('question'),
+            data.get('answer'),
+            data.get('uses', 0),
+        )
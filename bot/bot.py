@@ -0,0 +1,469 @@
+"""
+Core bot: consumes the Reddit inbox and runs each item through the pipeline.
+"""
+from typing import Any, Deque, Dict, List, Optional, Tuple
+import asyncio
+import time
+from collections import deque
+import asyncpraw
+import structlog
+from bot.analytics import AnalyticsEngine
+from bot.archive import ArchiveJob, ArchiveStore
+from bot.memory import MemoryManager
+from bot.message import Message
+from bot.moderation import ModerationSystem
+from bot.persona import PersonaEngine
+from config.settings import Settings
+from plugins.base import PluginManager
+from plugins.relationships import CRISIS_RESPONSE, is_crisis
+from utils.concurrency import AdaptiveConcurrencyLimiter, Overloaded
+from utils.loop_monitor import EventLoopMonitor
+from utils.near_duplicate import NearDuplicateIndex
+from utils.sentiment import SentimentAnalyzer
+from utils.slo import LatencySLO
+from utils.spool import Spool
+from utils.tracing import Tracer, span
+from utils.venice import VeniceClient
+
+logger = structlog.get_logger()
+
+QUEUE_SPOOL_STREAM = 'queue'
+
+
+class SimpiBot:
+    def __init__(self,
+                 settings: Settings,
+                 redis_pool,
+                 reddit: Optional[Any] = None,
+                 model: Optional[VeniceClient] = None):
+        self.settings = settings
+        self.redis = redis_pool
+        self.reddit = reddit
+        self.model = model or VeniceClient(
+            api_key=settings.venice.api_key,
+            base_url=settings.venice.base_url,
+            model=settings.venice.model,
+            timeout=settings.response_timeout
+        )
+
+        self.moderation = ModerationSystem(
+            near_duplicates=NearDuplicateIndex(
+                redis_pool,
+                window=settings.duplicate_window,
+                threshold=settings.duplicate_threshold,
+                min_users=settings.duplicate_min_users
+            )
+        )
+        self.moderation.spam_threshold = settings.spam_threshold
+        # With archiving on, old interactions move to Postgres instead of
+        # being trimmed away; the much higher cap only bounds Redis while
+        # Postgres is unreachable
+        self.memory = MemoryManager(
+            redis_pool,
+            max_interactions=(settings.archive_redis_cap
+                              if settings.database.postgres_url else 100)
+        )
+        self.persona = PersonaEngine()
+        self.model_limiter = AdaptiveConcurrencyLimiter(
+            name="model",
+            initial_limit=settings.model_concurrency,
+            max_limit=settings.model_concurrency_max,
+            max_queue=settings.model_queue_size,
+            queue_timeout=settings.model_queue_timeout
+        )
+        self.plugins = PluginManager(
+            redis_pool,
+            model=self.model,
+            model_limiter=self.model_limiter,
+            persona=self.persona
+        )
+        self.sentiment = SentimentAnalyzer()
+        self.analytics: Optional[AnalyticsEngine] = None
+        self.archive: Optional[ArchiveStore] = None
+        self.tracer = Tracer(
+            sample_rate=settings.trace_sample_rate,
+            slow_threshold=settings.trace_slow_threshold
+        )
+        self.loop_monitor = EventLoopMonitor(
+            threshold=settings.loop_lag_threshold
+        )
+
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.queue_size)
+        # Messages that arrived while the queue was full, in arrival order;
+        # still spooled, and moved into the queue as workers free space
+        self.overflow: Deque[Message] = deque()
+        # Crisis messages get their own queue and workers so they never
+        # wait behind ordinary traffic
+        self.crisis_queue: asyncio.Queue = asyncio.Queue()
+        # User -> recent crisis lane entries, for the per-user rate limit
+        self._crisis_entries: Dict[str, Deque[float]] = {}
+        self.crisis_slo = LatencySLO('crisis_lane', settings.crisis_slo_seconds)
+        self.tasks: List[asyncio.Task] = []
+
+        # Queued messages and unflushed analytics survive restarts here
+        self.spool: Optional[Spool] = None
+        if settings.spool_path:
+            self.spool = Spool(settings.spool_path)
+
+    async def start(self):
+        """Load plugins and start consuming the Reddit inbox."""
+        # Snapshot what was left over before new items are spooled
+        spooled = []
+        if self.spool is not None:
+            self.spool.open()
+            spooled = self.spool.pending_for(QUEUE_SPOOL_STREAM)
+
+        # AnalyticsEngine starts background tasks, so it needs a running loop
+        self.analytics = AnalyticsEngine(self.redis, spool=self.spool)
+        await self.plugins.load_plugins()
+        self.loop_monitor.start()
+
+        if self.reddit is None:
+            self.reddit = asyncpraw.Reddit(
+                client_id=self.settings.reddit.client_id,
+                client_secret=self.settings.reddit.client_secret,
+                username=self.settings.reddit.username,
+                password=self.settings.reddit.password,
+                user_agent=self.settings.reddit.user_agent
+            )
+
+        self.tasks = [
+            asyncio.create_task(self._consume_inbox()),
+            asyncio.create_task(self._report_metrics()),
+            # Its first sync loads recent signatures from Redis
+            asyncio.create_task(self.moderation.near_duplicates.run())
+        ]
+        if self.spool is not None:
+            self.tasks.extend([
+                asyncio.create_task(self._replay_spool(spooled)),
+                asyncio.create_task(self._maintain_spool())
+            ])
+
+        # History older than what replies need moves to Postgres
+        if self.settings.database.postgres_url:
+            self.archive = ArchiveStore(self.settings.database.postgres_url)
+            archive_job = ArchiveJob(
+                self.redis,
+                self.archive,
+                interval=self.settings.archive_interval
+            )
+            self.tasks.append(asyncio.create_task(archive_job.run()))
+
+        self.tasks.extend(
+            asyncio.create_task(self._crisis_worker())
+            for _ in range(self.settings.crisis_worker_count)
+        )
+        self.tasks.extend(
+            asyncio.create_task(self._worker())
+            for _ in range(self.settings.worker_count)
+        )
+        logger.info(
+            "Simpi bot started",
+            workers=self.settings.worker_count,
+            crisis_workers=self.settings.crisis_worker_count,
+            plugins=list(self.plugins.plugins)
+        )
+
+    async def _consume_inbox(self):
+        """Queue new inbox items (comment replies, mentions, messages)."""
+        while True:
+            try:
+                async for item in self.reddit.inbox.stream(skip_existing=True):
+                    self.enqueue(Message.from_item(item))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Inbox stream error", error=str(e))
+                await asyncio.sleep(5)
+
+    def enqueue(self, message: Message):
+        """Route a new message to the crisis lane or the normal queue.
+
+        Never blocks: a full normal queue must not hold up crisis messages
+        further down the stream, so overflow waits in `overflow` instead.
+        Queued messages are spooled until they have been handled.
+        """
+        if self.spool is not None and message.spool_id is None:
+            message.spool_id = self.spool.append(
+                QUEUE_SPOOL_STREAM,
+                message.to_dict()
+            )
+        if is_crisis(message) and self._crisis_allowed(message.user_id):
+            self.crisis_queue.put_nowait(message)
+            return
+        if self.overflow or self.queue.full():
+            self.overflow.append(message)
+            if len(self.overflow) == 1:
+                logger.warning(
+                    "Queue full, holding items in overflow",
+                    item_id=message.item_id,
+                    queue_size=self.queue.qsize()
+                )
+            return
+        self.queue.put_nowait(message)
+
+    def _drain_overflow(self):
+        """Move overflow into the queue while it has space."""
+        while self.overflow and not self.queue.full():
+            self.queue.put_nowait(self.overflow.popleft())
+
+    def _crisis_allowed(self, user_id: str) -> bool:
+        """Per-user rate limit on the crisis lane.
+
+        The crisis lane skips moderation, so a keyword flood from one
+        account goes through the normal queue (and its checks) instead.
+        """
+        now = time.monotonic()
+        cutoff = now - self.settings.crisis_rate_window
+        if len(self._crisis_entries) > 10000:
+            self._crisis_entries = {
+                user: entries for user, entries in self._crisis_entries.items()
+                if entries and entries[-1] >= cutoff
+            }
+
+        entries = self._crisis_entries.setdefault(user_id, deque())
+        while entries and entries[0] < cutoff:
+            entries.popleft()
+        if len(entries) >= self.settings.crisis_rate_limit:
+            logger.warning(
+                "Crisis lane rate limit reached, using normal queue",
+                user_id=user_id
+            )
+            return False
+        entries.append(now)
+        return True
+
+    def _ack(self, message: Message):
+        """Drop a handled message from the spool."""
+        if self.spool is not None:
+            self.spool.ack(message.spool_id)
+
+    async def _replay_spool(self, pending: List[Tuple[int, Dict]]):
+        """Re-queue messages that were still pending at the last shutdown."""
+        if not pending:
+            return
+
+        resumed = 0
+        for record_id, data in pending:
+            message = Message.from_dict(data)
+            message.spool_id = record_id
+            try:
+                message.item = await self._fetch_item(data.get('item_fullname'))
+            except Exception as e:
+                logger.warning(
+                    "Dropping spooled item",
+                    item_id=message.item_id,
+                    error=str(e)
+                )
+                self._ack(message)
+                continue
+            self.enqueue(message)
+            resumed += 1
+        logger.info("Resumed spooled items", resumed=resumed, pending=len(pending))
+
+    async def _fetch_item(self, fullname: Optional[str]):
+        """Fetch an inbox comment (t1_) or private message (t4_) by fullname."""
+        if not fullname:
+            raise ValueError("Item has no fullname")
+        kind, _, item_id = fullname.partition('_')
+        if kind == 't4':
+            return await self.reddit.inbox.message(item_id)
+        return await self.reddit.comment(item_id)
+
+    async def _maintain_spool(self, interval: Optional[float] = None):
+        """Flush the spool to disk and compact it when mostly acknowledged."""
+        interval = interval or self.settings.spool_flush_interval
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.spool.maintain()
+            except Exception as e:
+                logger.error("Error maintaining spool", error=str(e))
+
+    async def _crisis_worker(self):
+        """Reply to crisis messages as soon as they arrive."""
+        while True:
+            message = await self.crisis_queue.get()
+            try:
+                await self.process_crisis(message)
+            except Exception as e:
+                logger.error(
+                    "Error processing crisis item",
+                    error=str(e),
+                    item_id=message.item_id
+                )
+            finally:
+                self.crisis_queue.task_done()
+            # Not reached on cancellation: the item is replayed on restart
+            self._ack(message)
+
+    async def process_crisis(self, message: Message):
+        """Reply with crisis resources, skipping routing and the model."""
+        with self.tracer.trace("crisis_lane", item_id=message.item_id or ''):
+            with span("reddit.reply"):
+                await message.item.reply(CRISIS_RESPONSE)
+            latency = time.time() - message.received_at
+            self.crisis_slo.record(latency, item_id=message.item_id)
+
+            # Bookkeeping happens after the reply has been sent
+            await self.redis.hincrby('metrics:crisis_lane', 'replies', 1)
+            if latency > self.crisis_slo.target:
+                await self.redis.hincrby('metrics:crisis_lane', 'breaches', 1)
+            await self.memory.log_interaction(message.user_id, {
+                'timestamp': time.time(),
+                'prompt': message.text,
+                'response': CRISIS_RESPONSE,
+                'plugin': 'crisis'
+            })
+            await self.analytics.log_interaction(
+                message.user_id,
+                message,
+                CRISIS_RESPONSE,
+                latency,
+                plugin='crisis'
+            )
+
+    async def _worker(self):
+        """Process queued messages until cancelled."""
+        while True:
+            message = await self.queue.get()
+            # Refill the freed slot before task_done, so queue.join() also
+            # waits for the overflow
+            self._drain_overflow()
+            try:
+                await self.process_message(message)
+            except Exception as e:
+                logger.error(
+                    "Error processing item",
+                    error=str(e),
+                    item_id=message.item_id
+                )
+            finally:
+                self.queue.task_done()
+            # Not reached on cancellation: the item is replayed on restart
+            self._ack(message)
+
+    async def process_item(self, item) -> Optional[str]:
+        """Run a single inbox item through the pipeline and reply to it."""
+        return await self.process_message(Message.from_item(item))
+
+    async def process_message(self, message: Message) -> Optional[str]:
+        """Run a message through the pipeline and reply to it."""
+        with self.tracer.trace("process_item", item_id=message.item_id or ''):
+            return await self._process_message(message)
+
+    async def _process_message(self, message: Message) -> Optional[str]:
+        start_time = time.monotonic()
+        user_id = message.user_id
+
+        if not await self.moderation.check_message(message):
+            return None
+
+        context = await self.memory.get_context(user_id)
+
+        handler = await self.plugins.get_handler(message)
+        if handler:
+            with span("plugin.handle_message", plugin=handler.name):
+                reply = await handler.handle_message(message, context)
+        else:
+            reply = await self._generate_reply(message, context)
+
+        if not reply:
+            return None
+
+        with span("reddit.reply"):
+            await message.item.reply(reply)
+        response_time = time.monotonic() - start_time
+
+        sentiment_score, _ = self.sentiment.analyze(message)
+        await self.memory.log_interaction(user_id, {
+            'timestamp': time.time(),
+            'prompt': message.text,
+            'response': reply,
+            'plugin': handler.name if handler else None
+        })
+        await self.analytics.log_interaction(
+            user_id,
+            message,
+            reply,
+            response_time,
+            sentiment_score=sentiment_score,
+            plugin=handler.name if handler else None
+        )
+        return reply
+
+    async def _generate_reply(self,
+                              message: Message,
+                              context: dict) -> Optional[str]:
+        """Generate a general reply with the model."""
+        messages = self.persona.build_messages(
+            message.user_id,
+            message.text,
+            context
+        )
+        try:
+            return await self.model_limiter.call(self.model.complete, messages)
+        except Overloaded as e:
+            logger.warning(
+                "Model call shed",
+                error=str(e),
+                user_id=message.user_id
+            )
+            return None
+        except Exception as e:
+            logger.error(
+                "Model call failed",
+                error=str(e),
+                user_id=message.user_id
+            )
+            return None
+
+    async def _report_metrics(self, interval: float = 15.0):
+        """Export the model limiter's state and the crisis lane SLO."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.report_metrics()
+            except Exception as e:
+                logger.error("Error reporting metrics", error=str(e))
+
+    async def report_metrics(self):
+        """Write the limiter and crisis SLO stats to Redis hashes."""
+        stats = self.model_limiter.stats()
+        # Percentiles and compliance of this process's recent crisis
+        # replies; metrics:crisis_lane holds the counters across instances
+        slo = {
+            field: int(value) if isinstance(value, bool) else value
+            for field, value in self.crisis_slo.stats().items()
+        }
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hset('metrics:model_limiter', mapping=stats)
+        pipe.hset('metrics:crisis_slo', mapping=slo)
+        await pipe.execute()
+        logger.debug("Model limiter", **stats)
+
+    async def shutdown(self):
+        """Stop background tasks and close connections."""
+        tasks = list(self.tasks)
+        if self.analytics:
+            tasks.extend(self.analytics.tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.loop_monitor.stop()
+
+        if self.analytics is not None:
+            try:
+                await self.analytics.flush()
+            except Exception as e:
+                # Still spooled; written on the next start
+                logger.error("Error flushing analytics", error=str(e))
+        if self.spool is not None:
+            self.spool.close()
+
+        await self.model.close()
+        if self.archive is not None:
+            await self.archive.close()
+        if self.reddit is not None and hasattr(self.reddit, 'close'):
+            await self.reddit.close()
+        logger.info("Simpi bot stopped")
@@ -6,17 +6,18 @@ import json
 import time
 from dataclasses import dataclass
 import structlog
+from utils.tracing import traced
 
 logger = structlog.get_logger()
 
-dataclass
+@dataclass
 class UserPreference:
     topic_interests: List[str]
     expertise_level: str
     preferred_tone: str
     last_updated: float
 
-dataclass
+@dataclass
 class FAQ:
     question: str
     answer: str
@@ -24,9 +25,17 @@ class FAQ:
     uses: int
 
 class MemoryManager:
-    def __init__(self, redis_pool):
+    def __init__(self, redis_pool, max_interactions: Optional[int] = 100):
+        """
+        Args:
+            redis_pool: Redis connection pool
+            max_interactions: Interactions kept per user; None keeps all
+                (the archive job trims them once they are in Postgres)
+        """
         self.redis = redis_pool
+        self.max_interactions = max_interactions
         
+    @traced("memory.get_context")
     async def get_context(self, user_id: str) -> Dict:
         """Get full context for a user."""
         try:
@@ -71,6 +80,7 @@ class MemoryManager:
             interactions.append(json.loads(raw))
         return interactions
         
+    @traced("memory.update_preferences")
     async def update_preferences(self, 
                                user_id: str, 
                                preferences: UserPreference):
@@ -85,6 +95,7 @@ class MemoryManager:
                         error=str(e), 
                         user_id=user_id)
             
+    @traced("memory.save_faq")
     async def save_faq(self, user_id: str, question: str, answer: str):
         """Save a new FAQ for the user."""
         faq = FAQ(
@@ -104,6 +115,7 @@ class MemoryManager:
                         error=str(e), 
                         user_id=user_id)
             
+    @traced("memory.log_interaction")
     async def log_interaction(self, user_id: str, interaction: Dict):
         """Log a new interaction for the user."""
         try:
@@ -111,8 +123,12 @@ class MemoryManager:
                 f'interactions:{user_id}',
                 json.dumps(interaction)
             )
-            # Trim to last 100 interactions
-            await self.redis.ltrim(f'interactions:{user_id}', -100, -1)
+            if self.max_interactions is not None:
+                await self.redis.ltrim(
+                    f'interactions:{user_id}',
+                    -self.max_interactions,
+                    -1
+                )
         except Exception as e:
             logger.error("Error logging interaction", 
                         error=str(e), 
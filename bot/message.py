@@ -0,0 +1,139 @@
+"""
+Pre-processed message shared by every pipeline stage.
+"""
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple, Union
+import re
+import time
+from functools import cached_property
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9_+#']+")
+URL_PATTERN = re.compile(r"https?://[^\s)\]>]+", re.IGNORECASE)
+FENCED_CODE_PATTERN = re.compile(r"```[^\n]*\n(.*?)```", re.DOTALL)
+INDENTED_CODE_PATTERN = re.compile(r"(?:^(?: {4}|\t).*(?:\n|$))+", re.MULTILINE)
+
+LANGUAGE_PATTERNS = {
+    'python': re.compile(r'\b(python|py)\b'),
+    'javascript': re.compile(r'\b(javascript|js)\b'),
+    'java': re.compile(r'\bjava\b'),
+    'c++': re.compile(r'\b(c\+\+|cpp)\b'),
+}
+
+# Words shorter than this are ignored for trending topics
+MIN_TOPIC_LENGTH = 4
+
+
+class Message:
+    """An incoming message, normalized once at ingestion.
+
+    Derived attributes are computed lazily on first access and cached, so
+    moderation, plugins, sentiment and analytics all share the same work.
+    """
+
+    def __init__(self,
+                 text: str,
+                 user_id: Optional[str] = None,
+                 item_id: Optional[str] = None,
+                 subreddit: Optional[str] = None,
+                 received_at: Optional[float] = None,
+                 item: Any = None):
+        self.text = text
+        self.user_id = user_id
+        self.item_id = item_id
+        self.subreddit = subreddit
+        self.received_at = received_at or time.time()
+        # The Reddit object to reply to; not part of the message data
+        self.item = item
+        self.sentiment: Optional[Tuple[float, str]] = None
+        # Spool record that keeps the message durable until it is handled
+        self.spool_id: Optional[int] = None
+
+    @classmethod
+    def from_item(cls, item: Any) -> 'Message':
+        """Build a message from an asyncpraw inbox item."""
+        subreddit = getattr(item, 'subreddit', None)
+        return cls(
+            text=item.body,
+            user_id=str(item.author) if item.author else '[deleted]',
+            item_id=getattr(item, 'id', None),
+            subreddit=str(subreddit) if subreddit else None,
+            item=item
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], item: Any = None) -> 'Message':
+        """Rebuild a message from to_dict() output."""
+        return cls(
+            text=data['text'],
+            user_id=data.get('user_id'),
+            item_id=data.get('item_id'),
+            subreddit=data.get('subreddit'),
+            received_at=data.get('received_at'),
+            item=item
+        )
+
+    @classmethod
+    def coerce(cls, message: Union[str, 'Message']) -> 'Message':
+        """Wrap a raw string, or return an existing message unchanged."""
+        if isinstance(message, Message):
+            return message
+        return cls(message)
+
+    def __str__(self) -> str:
+        return self.text
+
+    def __repr__(self) -> str:
+        return f"Message(item_id={self.item_id!r}, user_id={self.user_id!r})"
+
+    @cached_property
+    def normalized(self) -> str:
+        """Lowercased text."""
+        return self.text.lower()
+
+    @cached_property
+    def tokens(self) -> List[str]:
+        """Lowercased word tokens (excluding URLs), in order."""
+        return TOKEN_PATTERN.findall(URL_PATTERN.sub(' ', self.normalized))
+
+    @cached_property
+    def token_set(self) -> FrozenSet[str]:
+        return frozenset(self.tokens)
+
+    @cached_property
+    def topics(self) -> List[str]:
+        """Tokens long enough to count towards trending topics."""
+        return [t for t in self.tokens if len(t) >= MIN_TOPIC_LENGTH]
+
+    @cached_property
+    def language(self) -> Optional[str]:
+        """Programming language mentioned in the message, if any."""
+        for lang, pattern in LANGUAGE_PATTERNS.items():
+            if pattern.search(self.normalized):
+                return lang
+        return None
+
+    @cached_property
+    def urls(self) -> List[str]:
+        return URL_PATTERN.findall(self.text)
+
+    @cached_property
+    def code_blocks(self) -> List[str]:
+        """Fenced (```) and four-space indented code blocks."""
+        blocks = [b.strip('\n') for b in FENCED_CODE_PATTERN.findall(self.text)]
+        prose = FENCED_CODE_PATTERN.sub('', self.text)
+        for block in INDENTED_CODE_PATTERN.findall(prose):
+            lines = [line[4:] if line.startswith('    ') else line[1:]
+                     for line in block.splitlines()]
+            blocks.append('\n'.join(lines))
+        return blocks
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializable message data (without the Reddit object)."""
+        return {
+            'text': self.text,
+            'user_id': self.user_id,
+            'item_id': self.item_id,
+            'subreddit': self.subreddit,
+            'received_at': self.received_at,
+            # Lets the Reddit object be fetched again, e.g. after a restart
+            'item_fullname': getattr(self.item, 'fullname', None),
+        }
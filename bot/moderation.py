@@ -1,26 +1,33 @@
 """
 Content moderation and safety control system.
 """
-from typing import List, Dict, Set
+from typing import List, Dict, Optional, Pattern, Set, Union
 import re
 import asyncio
 from dataclasses import dataclass
 import structlog
+from bot.message import Message
+from utils.error_signature import extract_error_signature
+from utils.near_duplicate import NearDuplicateIndex
+from utils.tracing import traced
 
 logger = structlog.get_logger()
 
-dataclass
+@dataclass
 class ContentFlag:
     reason: str
     severity: int
     context: str
 
 class ModerationSystem:
-    def __init__(self):
+    def __init__(self, near_duplicates: Optional[NearDuplicateIndex] = None):
         self.blocked_patterns: Set[str] = set()
+        self._compiled_patterns: List[Pattern] = []
         self.spam_threshold = 5
         self.user_message_count: Dict[str, int] = {}
         self.flagged_content: Dict[str, List[ContentFlag]] = {}
+        # Catches the same text posted from many accounts
+        self.near_duplicates = near_duplicates or NearDuplicateIndex()
         
         # Load blocked patterns
         self._load_patterns()
@@ -33,23 +40,48 @@ class ModerationSystem:
             r'(^|\s)spam(\s|$)',
             # Add more patterns as needed
         }
+        self._compiled_patterns = [
+            re.compile(pattern) for pattern in self.blocked_patterns
+        ]
         
-    async def check_message(self, content: str, user_id: str = None) -> bool:
+    @traced("moderation.check_message")
+    async def check_message(self, 
+                            message: Union[str, Message], 
+                            user_id: Optional[str] = None) -> bool:
         """Check if message content passes moderation rules.
         Returns True if content is safe, False if it should be blocked."""
-        content = content.lower()
+        message = Message.coerce(message)
+        user_id = user_id or message.user_id
+        content = message.normalized
         
         # Check against blocked patterns
-        for pattern in self.blocked_patterns:
-            if re.search(pattern, content):
+        for pattern in self._compiled_patterns:
+            if pattern.search(content):
                 await self._flag_content(
                     user_id, 
                     "blocked_pattern", 
                     2, 
-                    pattern
+                    pattern.pattern
                 )
                 return False
                 
+        # Check for copy-paste campaigns across users. Every message is
+        # indexed, but recurring questions and error reports legitimately
+        # repeat: only link-bearing clusters are blocked, link-free ones
+        # are flagged for review, and error reports are left alone
+        cluster = self.near_duplicates.check(message, user_id)
+        if cluster is not None and extract_error_signature(message) is None:
+            await self._flag_content(
+                user_id,
+                "near_duplicate",
+                1,
+                f"{cluster.size} similar messages from "
+                f"{len(cluster.users)} users"
+                f"{' with links' if message.urls else ''}"
+            )
+            if message.urls:
+                return False
+            
         # Check for spam
         if user_id:
             if await self._check_spam(user_id):
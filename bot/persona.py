@@ -0,0 +1,176 @@
+"""
+Persona and tone adaptation for model prompts.
+"""
+from typing import Dict, List, Optional, Tuple
+import functools
+import os
+from string import Template
+import yaml
+import structlog
+
+logger = structlog.get_logger()
+
+DEFAULT_PROMPTS_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'config',
+    'prompts.yaml'
+)
+
+# Upper bound for memoized system prompts. Unknown tones, expertise levels
+# and plugins are mapped to the defaults, so the real key space is
+# personas x plugins x tones x expertise levels.
+PREFIX_CACHE_SIZE = 256
+
+
+class PersonaEngine:
+    def __init__(self, prompts_path: str = DEFAULT_PROMPTS_PATH):
+        with open(prompts_path, encoding='utf-8') as f:
+            config = yaml.safe_load(f) or {}
+
+        self.defaults: Dict[str, str] = config.get('defaults', {})
+
+        # Compile every template once; rendering only substitutes values
+        self.personas: Dict[str, Template] = {}
+        self.persona_names: Dict[str, str] = {}
+        for key, persona in config.get('personas', {}).items():
+            self.personas[key] = Template(persona['base'].strip())
+            self.persona_names[key] = persona.get('name', key)
+
+        self.plugins = self._compile(config.get('plugins', {}))
+        self.tones = self._compile(config.get('tones', {}))
+        self.expertise_levels = self._compile(config.get('expertise', {}))
+        self.context_template = Template(config.get('context', ''))
+
+        self._render_prefix = functools.lru_cache(maxsize=PREFIX_CACHE_SIZE)(
+            self._render_prefix_uncached
+        )
+
+        logger.info(
+            "Persona templates compiled",
+            personas=len(self.personas),
+            tones=len(self.tones),
+            plugins=len(self.plugins)
+        )
+
+    @staticmethod
+    def _compile(section: Dict[str, str]) -> Dict[str, Template]:
+        """Compile a mapping of name -> template text."""
+        return {
+            key: Template(text.strip())
+            for key, text in section.items()
+        }
+
+    def _resolve(self,
+                 value: Optional[str],
+                 choices: Dict[str, Template],
+                 kind: str) -> str:
+        """Map a requested value onto a known template key."""
+        if value:
+            value = value.lower()
+            if value in choices:
+                return value
+        return self.defaults.get(kind, next(iter(choices), ''))
+
+    def system_prompt(self,
+                      persona: Optional[str] = None,
+                      tone: Optional[str] = None,
+                      expertise: Optional[str] = None,
+                      plugin: Optional[str] = None) -> str:
+        """Get the system prompt for a persona/tone/expertise/plugin combination.
+
+        The rendered prompt is memoized, so repeated calls return the same
+        string object and its bytes never change between requests.
+        """
+        return self._render_prefix(
+            self._resolve(persona, self.personas, 'persona'),
+            self._resolve(plugin, self.plugins, 'plugin'),
+            self._resolve(tone, self.tones, 'tone'),
+            self._resolve(expertise, self.expertise_levels, 'expertise')
+        )
+
+    def _render_prefix_uncached(self,
+                                persona: str,
+                                plugin: str,
+                                tone: str,
+                                expertise: str) -> str:
+        """Render a system prompt, most stable section first."""
+        values = {'name': self.persona_names.get(persona, persona)}
+        sections = [
+            self.personas[persona],
+            self.plugins.get(plugin),
+            self.tones.get(tone),
+            self.expertise_levels.get(expertise),
+        ]
+        return '\n\n'.join(
+            section.safe_substitute(values)
+            for section in sections
+            if section is not None
+        )
+
+    def render_context(self, user_id: str, context: Dict) -> str:
+        """Render the per-user context block."""
+        preferences = context.get('preferences')
+        interests = getattr(preferences, 'topic_interests', None) or []
+
+        faqs = ''.join(
+            f"- Previously asked: {faq.question}\n"
+            for faq in (context.get('faqs') or [])[-3:]
+        )
+        recent = ''.join(
+            f"- Recently said: {interaction.get('prompt', '')}\n"
+            for interaction in context.get('recent_interactions') or []
+        )
+
+        return self.context_template.safe_substitute(
+            user_id=user_id,
+            interests=', '.join(interests) or 'unknown',
+            faqs=faqs,
+            recent=recent
+        ).strip()
+
+    def build_messages(self,
+                       user_id: str,
+                       message: str,
+                       context: Optional[Dict] = None,
+                       plugin: Optional[str] = None,
+                       persona: Optional[str] = None) -> List[Dict[str, str]]:
+        """Build chat messages for a model call.
+
+        The system prompt comes first and is shared by every user with the
+        same preferences; per-user context and the message itself follow it
+        so they never invalidate the cached prefix.
+        """
+        context = context or {}
+        tone, expertise = self._preference_keys(context)
+
+        messages = [{
+            'role': 'system',
+            'content': self.system_prompt(persona, tone, expertise, plugin)
+        }]
+        if context:
+            messages.append({
+                'role': 'system',
+                'content': self.render_context(user_id, context)
+            })
+        messages.append({'role': 'user', 'content': message})
+        return messages
+
+    @staticmethod
+    def _preference_keys(context: Dict) -> Tuple[Optional[str], Optional[str]]:
+        """Extract tone and expertise from a MemoryManager context."""
+        preferences = context.get('preferences')
+        if preferences is None:
+            return None, None
+        return (
+            getattr(preferences, 'preferred_tone', None),
+            getattr(preferences, 'expertise_level', None)
+        )
+
+    def cache_info(self) -> Dict[str, int]:
+        """Get hit/miss statistics for the system prompt cache."""
+        info = self._render_prefix.cache_info()
+        return {
+            'hits': info.hits,
+            'misses': info.misses,
+            'size': info.currsize
+        }
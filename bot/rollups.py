@@ -0,0 +1,298 @@
+"""
+Pre-aggregated, time-bucketed analytics rollups.
+
+Interactions are counted into per-minute buckets, one Redis hash per
+bucket. A scheduled job downsamples completed minutes into hours and hours
+into days, and every level expires after its own retention. Dashboards
+read one hash per bucket instead of scanning analytics:interactions.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+import asyncio
+import time
+from dataclasses import dataclass
+import structlog
+
+logger = structlog.get_logger()
+
+
+@dataclass(frozen=True)
+class Resolution:
+    name: str
+    seconds: int
+    retention: int
+
+
+MINUTE = Resolution('minute', 60, 2 * 86400)
+HOUR = Resolution('hour', 3600, 35 * 86400)
+DAY = Resolution('day', 86400, 400 * 86400)
+RESOLUTIONS = [MINUTE, HOUR, DAY]
+RESOLUTIONS_BY_NAME = {r.name: r for r in RESOLUTIONS}
+
+# Upper bounds (seconds) of the response time histogram buckets
+LATENCY_BUCKETS = (0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0)
+LATENCY_FIELDS = [f"latency:{b}" for b in LATENCY_BUCKETS] + ["latency:+inf"]
+
+STATE_KEY = 'rollup:state'
+
+# Automatic resolution picks the finest level with at most this many buckets
+MAX_AUTO_BUCKETS = 500
+MAX_BUCKETS = 5000
+
+
+def bucket_start(timestamp: float, seconds: int) -> int:
+    return int(timestamp // seconds * seconds)
+
+
+def bucket_key(resolution: Resolution, start: int) -> str:
+    return f"rollup:{resolution.name}:{start}"
+
+
+def latency_field(response_time: float) -> str:
+    for bound, field in zip(LATENCY_BUCKETS, LATENCY_FIELDS):
+        if response_time <= bound:
+            return field
+    return LATENCY_FIELDS[-1]
+
+
+def merge(target: Dict[str, float], fields: Dict[str, float]) -> Dict[str, float]:
+    """Add one bucket's counters into another (every field is a sum)."""
+    for field, value in fields.items():
+        target[field] = target.get(field, 0.0) + float(value)
+    return target
+
+
+def summarize(fields: Dict[str, float]) -> Dict:
+    """Turn raw bucket counters into dashboard metrics."""
+    count = int(fields.get('count', 0))
+    sentiment_count = fields.get('sentiment_count', 0)
+
+    histogram = {
+        field.split(':', 1)[1]: int(fields.get(field, 0))
+        for field in LATENCY_FIELDS
+    }
+
+    def percentile(pct: float) -> Optional[float]:
+        # Upper bound of the histogram bucket holding the percentile
+        if not count:
+            return None
+        seen = 0
+        for bound, field in zip(LATENCY_BUCKETS + (float('inf'),), LATENCY_FIELDS):
+            seen += fields.get(field, 0)
+            if seen >= pct / 100 * count:
+                return bound
+        return float('inf')
+
+    breakdowns: Dict[str, Dict[str, int]] = {'plugin': {}, 'subreddit': {}}
+    for field, value in fields.items():
+        kind, _, name = field.partition(':')
+        if kind in breakdowns:
+            breakdowns[kind][name] = int(value)
+
+    return {
+        'interactions': count,
+        'avg_response_time': fields.get('latency_sum', 0.0) / count if count else None,
+        'p50_response_time': percentile(50),
+        'p95_response_time': percentile(95),
+        'latency_histogram': histogram,
+        'avg_sentiment': (fields.get('sentiment_sum', 0.0) / sentiment_count
+                          if sentiment_count else None),
+        'plugins': breakdowns['plugin'],
+        'subreddits': breakdowns['subreddit'],
+    }
+
+
+class RollupEngine:
+    def __init__(self,
+                 redis_pool,
+                 flush_interval: float = 10.0,
+                 downsample_interval: float = 60.0,
+                 grace: int = 120):
+        """
+        Args:
+            redis_pool: Redis connection pool
+            flush_interval: Seconds between writes of buffered minute counters
+            downsample_interval: Seconds between downsampling passes
+            grace: Seconds after a bucket ends before it is downsampled, so
+                late counters are included
+        """
+        self.redis = redis_pool
+        self.flush_interval = flush_interval
+        self.downsample_interval = downsample_interval
+        self.grace = grace
+        # Minute bucket start -> counters not yet written to Redis
+        self._pending: Dict[int, Dict[str, float]] = {}
+
+    def record(self,
+               timestamp: float,
+               response_time: float,
+               sentiment_score: Optional[float] = None,
+               plugin: Optional[str] = None,
+               subreddit: Optional[str] = None):
+        """Count one interaction into its minute bucket (in memory)."""
+        fields = self._pending.setdefault(bucket_start(timestamp, MINUTE.seconds), {})
+        updates = {
+            'count': 1,
+            'latency_sum': response_time,
+            latency_field(response_time): 1,
+            f"plugin:{plugin or 'general'}": 1,
+        }
+        if sentiment_score is not None:
+            updates['sentiment_sum'] = sentiment_score
+            updates['sentiment_count'] = 1
+        if subreddit:
+            updates[f"subreddit:{subreddit}"] = 1
+        merge(fields, updates)
+
+    async def flush(self):
+        """Write buffered minute counters to Redis in one transaction."""
+        if not self._pending:
+            return
+
+        pending, self._pending = self._pending, {}
+        pipe = self.redis.pipeline(transaction=True)
+        for start, fields in pending.items():
+            key = bucket_key(MINUTE, start)
+            for field, value in fields.items():
+                pipe.hincrbyfloat(key, field, value)
+            pipe.expire(key, MINUTE.retention)
+        try:
+            await pipe.execute()
+        except BaseException:
+            # The transaction fails as a whole; keep the counters for the
+            # next flush
+            for start, fields in pending.items():
+                merge(self._pending.setdefault(start, {}), fields)
+            raise
+
+    async def run(self):
+        """Flush and downsample periodically until cancelled."""
+        last_downsample = 0.0
+        while True:
+            try:
+                await asyncio.sleep(self.flush_interval)
+                await self.flush()
+                if time.monotonic() - last_downsample >= self.downsample_interval:
+                    await self.downsample()
+                    last_downsample = time.monotonic()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Error updating rollups", error=str(e))
+
+    async def downsample(self, now: Optional[float] = None) -> Dict[str, int]:
+        """Roll completed minutes into hours and hours into days.
+
+        Progress is kept in rollup:state, and a coarse bucket is always
+        rewritten from scratch, so an interrupted pass is simply redone.
+        """
+        now = now or time.time()
+        state = await self.redis.hgetall(STATE_KEY)
+        rolled = {}
+        for finer, coarser in zip(RESOLUTIONS, RESOLUTIONS[1:]):
+            # First bucket that has not ended `grace` seconds ago
+            complete_before = bucket_start(now - self.grace, coarser.seconds)
+            # Finer buckets older than their retention are already gone, so
+            # the first pass backfills from there
+            earliest = bucket_start(now - finer.retention, coarser.seconds)
+            start = max(int(state.get(coarser.name) or 0), earliest)
+
+            rolled[coarser.name] = 0
+            while start < complete_before:
+                await self._rollup(finer, coarser, start)
+                start += coarser.seconds
+                rolled[coarser.name] += 1
+                await self.redis.hset(STATE_KEY, coarser.name, start)
+        return rolled
+
+    async def _rollup(self, finer: Resolution, coarser: Resolution, start: int):
+        starts = range(start, start + coarser.seconds, finer.seconds)
+        pipe = self.redis.pipeline(transaction=False)
+        for s in starts:
+            pipe.hgetall(bucket_key(finer, s))
+        totals: Dict[str, float] = {}
+        for fields in await pipe.execute():
+            merge(totals, fields or {})
+        if not totals:
+            return
+
+        key = bucket_key(coarser, start)
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.delete(key)
+        pipe.hset(key, mapping=totals)
+        pipe.expire(key, coarser.retention)
+        await pipe.execute()
+
+    def pick_resolution(self, start: float, end: float) -> Resolution:
+        """Finest resolution that still has data for `start` and few buckets."""
+        age = time.time() - start
+        for resolution in RESOLUTIONS:
+            if (age <= resolution.retention and
+                    (end - start) / resolution.seconds <= MAX_AUTO_BUCKETS):
+                return resolution
+        return DAY
+
+    def _buckets(self,
+                 start: float,
+                 end: float,
+                 resolution: Optional[str]) -> Tuple[Resolution, range]:
+        res = (RESOLUTIONS_BY_NAME[resolution] if resolution
+               else self.pick_resolution(start, end))
+        starts = range(bucket_start(start, res.seconds), int(end), res.seconds)
+        if len(starts) > MAX_BUCKETS:
+            raise ValueError(
+                f"Range spans {len(starts)} {res.name} buckets "
+                f"(max {MAX_BUCKETS}); use a coarser resolution"
+            )
+        return res, starts
+
+    async def _read(self,
+                    resolution: Resolution,
+                    starts: Sequence[int],
+                    state: Dict[str, str]) -> List[Dict[str, float]]:
+        """Counters for each bucket; not-yet-downsampled ones come from finer buckets."""
+        pipe = self.redis.pipeline(transaction=False)
+        for s in starts:
+            pipe.hgetall(bucket_key(resolution, s))
+        buckets = [
+            {field: float(value) for field, value in (fields or {}).items()}
+            for fields in await pipe.execute()
+        ]
+
+        index = RESOLUTIONS.index(resolution)
+        if index == 0:
+            return buckets
+        rolled_until = int(state.get(resolution.name) or 0)
+        finer = RESOLUTIONS[index - 1]
+        now = time.time()
+        for i, s in enumerate(starts):
+            if rolled_until <= s <= now:
+                sub_starts = range(s, s + resolution.seconds, finer.seconds)
+                buckets[i] = {}
+                for fields in await self._read(finer, sub_starts, state):
+                    merge(buckets[i], fields)
+        return buckets
+
+    async def series(self,
+                     start: float,
+                     end: float,
+                     resolution: Optional[str] = None) -> List[Dict]:
+        """Metrics per bucket between start and end (epoch seconds)."""
+        res, starts = self._buckets(start, end, resolution)
+        state = await self.redis.hgetall(STATE_KEY)
+        buckets = await self._read(res, starts, state)
+        return [
+            {'start': s, 'resolution': res.name, **summarize(fields)}
+            for s, fields in zip(starts, buckets)
+        ]
+
+    async def summary(self,
+                      start: float,
+                      end: float,
+                      resolution: Optional[str] = None) -> Dict:
+        """Metrics aggregated over the whole range."""
+        res, starts = self._buckets(start, end, resolution)
+        state = await self.redis.hgetall(STATE_KEY)
+        totals: Dict[str, float] = {}
+        for fields in await self._read(res, starts, state):
+            merge(totals, fields)
+        return {'start': start, 'end': end, 'resolution': res.name, **summarize(totals)}
@@ -1,22 +1,189 @@
 """
 Structured logging configuration for Simpi Singh.
+
+Log calls on the event loop only build the event dict and hand the record
+to a bounded queue. JSON rendering and writing happen on a QueueListener
+thread, so slow stdout/stderr or a log storm cannot stall the loop.
 """
+from typing import Dict, Optional, Tuple
+import json
 import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
 import structlog
 
-def setup_logging(log_level: str = "INFO"):
-    logging.basicConfig(
-        format="%(message)s",
-        stream=None,
-        level=getattr(logging, log_level.upper(), "INFO"),
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+# Hot-path events and their allowed rate as (events per second, burst).
+# Anything above the rate is dropped and counted in `sampled_out` on the
+# next event that gets through.
+DEFAULT_EVENT_LIMITS: Dict[str, Tuple[float, int]] = {
+    "Content flagged": (5.0, 20),
+    "Operation failed, retrying": (2.0, 10),
+    "Slack notification failed": (1.0, 5),
+    "Slack notification error": (1.0, 5),
+    "Discord notification failed": (1.0, 5),
+    "Discord notification error": (1.0, 5),
+    "Event loop lag": (1.0, 5),
+}
+
+DEFAULT_QUEUE_SIZE = 10000
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def _dumps(obj, **kwargs) -> str:
+    """Serialize an event dict, preferring orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str).decode()
+    # structlog's JSONRenderer passes its own `default`
+    kwargs.setdefault('default', str)
+    return json.dumps(obj, **kwargs)
+
+
+class EventSampler:
+    """structlog processor that rate-limits high-volume events.
+
+    Each event name gets a token bucket; events without a configured limit
+    always pass.
+    """
+
+    def __init__(self, limits: Dict[str, Tuple[float, int]]):
+        self.limits = limits
+        self._buckets: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, logger, method_name: str, event_dict: Dict) -> Dict:
+        event = event_dict.get("event")
+        limit = self.limits.get(event)
+        if limit is None:
+            return event_dict
+
+        rate, burst = limit
+        now = time.monotonic()
+        with self._lock:
+            # [tokens, last refill, dropped since last emitted event]
+            bucket = self._buckets.setdefault(event, [float(burst), now, 0])
+            bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                raise structlog.DropEvent
+            bucket[0] -= 1
+            dropped, bucket[2] = bucket[2], 0
+
+        if dropped:
+            event_dict["sampled_out"] = dropped
+        return event_dict
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks and leaves rendering to the listener."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The listener runs in the same process, so the record (and the
+        # structlog event dict in record.msg) can be passed as-is.
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return
+
+        if self.dropped:
+            try:
+                self.queue.put_nowait(self._dropped_record())
+                self.dropped = 0
+            except queue.Full:
+                pass
+
+    def _dropped_record(self) -> logging.LogRecord:
+        return logging.LogRecord(
+            name=__name__,
+            level=logging.WARNING,
+            pathname=__file__,
+            lineno=0,
+            msg="Log queue full, records dropped: %d",
+            args=(self.dropped,),
+            exc_info=None
+        )
+
+
+def setup_logging(log_level: str = "INFO",
+                  event_limits: Optional[Dict[str, Tuple[float, int]]] = None,
+                  queue_size: int = DEFAULT_QUEUE_SIZE
+                  ) -> logging.handlers.QueueListener:
+    """Configure structlog and stdlib logging to write through a queue thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+
+    level = getattr(logging, log_level.upper(), logging.INFO)
+    timestamper = structlog.processors.TimeStamper(fmt="iso")
+
+    formatter = structlog.stdlib.ProcessorFormatter(
+        processors=[
+            structlog.stdlib.ProcessorFormatter.remove_processors_meta,
+            structlog.processors.JSONRenderer(serializer=_dumps),
+        ],
+        # Records from libraries that log through stdlib directly
+        foreign_pre_chain=[
+            structlog.stdlib.add_log_level,
+            timestamper,
+        ],
+    )
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(formatter)
+
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(NonBlockingQueueHandler(log_queue))
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(
+        log_queue,
+        output,
+        respect_handler_level=True
     )
+    _listener.start()
+
     structlog.configure(
         processors=[
-            structlog.processors.TimeStamper(fmt="iso"),
-            structlog.processors.JSONRenderer()
+            structlog.contextvars.merge_contextvars,
+            structlog.stdlib.add_log_level,
+            EventSampler(
+                DEFAULT_EVENT_LIMITS if event_limits is None else event_limits
+            ),
+            timestamper,
+            # Tracebacks must be captured on the thread that raised them
+            structlog.processors.format_exc_info,
+            structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
         ],
-        wrapper_class=structlog.make_filtering_bound_logger(logging.INFO),
+        wrapper_class=structlog.make_filtering_bound_logger(level),
         context_class=dict,
         logger_factory=structlog.stdlib.LoggerFactory(),
         cache_logger_on_first_use=True,
     )
+    return _listener
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -16,6 +16,8 @@ class RedditSettings:
 @dataclass
 class VeniceSettings:
     api_key: str
+    base_url: str = "https://openrouter.ai/api/v1"
+    model: str = "cognitivecomputations/dolphin-mistral-24b-venice-edition:free"
 
 @dataclass
 class DatabaseSettings:
@@ -37,6 +39,26 @@ class Settings:
     spam_threshold: int = 5
     response_timeout: int = 30
     max_retries: int = 3
+    worker_count: int = 4
+    queue_size: int = 1000
+    trace_sample_rate: float = 0.01
+    trace_slow_threshold: float = 5.0
+    loop_lag_threshold: float = 0.1
+    crisis_worker_count: int = 2
+    crisis_slo_seconds: float = 2.0
+    crisis_rate_limit: int = 3
+    crisis_rate_window: int = 3600
+    archive_interval: int = 3600
+    archive_redis_cap: int = 5000
+    model_concurrency: int = 8
+    model_concurrency_max: int = 64
+    model_queue_size: int = 100
+    model_queue_timeout: float = 10.0
+    spool_path: Optional[str] = "data/simpi.spool"
+    spool_flush_interval: float = 1.0
+    duplicate_window: int = 3600
+    duplicate_threshold: float = 0.6
+    duplicate_min_users: int = 5
 
 def load_settings() -> Settings:
     return Settings(
@@ -48,7 +70,14 @@ def load_settings() -> Settings:
             user_agent=os.getenv("REDDIT_USER_AGENT", "SimpiSinghBot/1.0")
         ),
         venice=VeniceSettings(
-            api_key=os.getenv("VENICE_API_KEY", "")
+            api_key=os.getenv("VENICE_API_KEY", ""),
+            base_url=os.getenv(
+                "VENICE_BASE_URL", "https://openrouter.ai/api/v1"
+            ),
+            model=os.getenv(
+                "VENICE_MODEL",
+                "cognitivecomputations/dolphin-mistral-24b-venice-edition:free"
+            )
         ),
         database=DatabaseSettings(
             redis_url=os.getenv("REDIS_URL", "redis://localhost:6379"),
@@ -62,4 +91,24 @@ def load_settings() -> Settings:
         spam_threshold=int(os.getenv("SPAM_THRESHOLD", "5")),
         response_timeout=int(os.getenv("RESPONSE_TIMEOUT", "30")),
         max_retries=int(os.getenv("MAX_RETRIES", "3")),
+        worker_count=int(os.getenv("WORKER_COUNT", "4")),
+        queue_size=int(os.getenv("QUEUE_SIZE", "1000")),
+        trace_sample_rate=float(os.getenv("TRACE_SAMPLE_RATE", "0.01")),
+        trace_slow_threshold=float(os.getenv("TRACE_SLOW_THRESHOLD", "5.0")),
+        loop_lag_threshold=float(os.getenv("LOOP_LAG_THRESHOLD", "0.1")),
+        crisis_worker_count=int(os.getenv("CRISIS_WORKER_COUNT", "2")),
+        crisis_slo_seconds=float(os.getenv("CRISIS_SLO_SECONDS", "2.0")),
+        crisis_rate_limit=int(os.getenv("CRISIS_RATE_LIMIT", "3")),
+        crisis_rate_window=int(os.getenv("CRISIS_RATE_WINDOW", "3600")),
+        archive_interval=int(os.getenv("ARCHIVE_INTERVAL", "3600")),
+        archive_redis_cap=int(os.getenv("ARCHIVE_REDIS_CAP", "5000")),
+        model_concurrency=int(os.getenv("MODEL_CONCURRENCY", "8")),
+        model_concurrency_max=int(os.getenv("MODEL_CONCURRENCY_MAX", "64")),
+        model_queue_size=int(os.getenv("MODEL_QUEUE_SIZE", "100")),
+        model_queue_timeout=float(os.getenv("MODEL_QUEUE_TIMEOUT", "10.0")),
+        spool_path=os.getenv("SPOOL_PATH", "data/simpi.spool") or None,
+        spool_flush_interval=float(os.getenv("SPOOL_FLUSH_INTERVAL", "1.0")),
+        duplicate_window=int(os.getenv("DUPLICATE_WINDOW", "3600")),
+        duplicate_threshold=float(os.getenv("DUPLICATE_THRESHOLD", "0.6")),
+        duplicate_min_users=int(os.getenv("DUPLICATE_MIN_USERS", "5")),
     )
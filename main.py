@@ -5,9 +5,11 @@ Initializes and runs the Reddit bot with all its components.
 """
 import asyncio
 import os
+import signal
 from dotenv import load_dotenv
 import structlog
 from bot.bot import SimpiBot
+from config.logging import setup_logging, shutdown_logging
 from config.settings import load_settings
 from utils.redis_client import init_redis_pool
 
@@ -17,12 +19,23 @@ logger = structlog.get_logger()
 
 async def main():
     """Initialize and run the Simpi bot."""
+    bot = None
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            # Windows: Ctrl+C still raises KeyboardInterrupt
+            pass
+
     try:
         # Load environment variables
         load_dotenv()
 
         # Load configuration
         settings = load_settings()
+        setup_logging(settings.log_level)
 
         # Initialize Redis connection
         redis_pool = await init_redis_pool(os.getenv('REDIS_URL'))
@@ -31,16 +44,20 @@ async def main():
         bot = SimpiBot(settings, redis_pool)
         await bot.start()
 
-        # Keep the bot running
-        while True:
-            await asyncio.sleep(1)
+        # Keep the bot running until a shutdown signal arrives
+        await stop.wait()
+        logger.info("Shutting down Simpi bot...")
 
-    except KeyboardInterrupt:
+    except (KeyboardInterrupt, asyncio.CancelledError):
         logger.info("Shutting down Simpi bot...")
-        await bot.shutdown()
     except Exception as e:
         logger.error("Fatal error", error=str(e))
         raise
+    finally:
+        # Always stop cleanly so the spool and analytics are flushed
+        if bot is not None:
+            await bot.shutdown()
+        shutdown_logging()
 
 
 if __name__ == "__main__":
@@ -6,24 +6,89 @@ import importlib
 import pkgutil
 import structlog
 from abc import ABC, abstractmethod
+from bot.message import Message
+from utils.concurrency import AdaptiveConcurrencyLimiter, Overloaded
+from utils.tracing import traced
 
 logger = structlog.get_logger()
 
 class BasePlugin(ABC):
     name: str = None  # Must be set by subclasses
+    redis = None  # Shared Redis pool, set by setup()
+    model = None  # Shared VeniceClient, set by setup()
+    model_limiter: Optional[AdaptiveConcurrencyLimiter] = None
+    persona = None  # Shared PersonaEngine, set by setup()
     
+    async def setup(self, 
+                    redis_pool, 
+                    model=None, 
+                    model_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+                    persona=None) -> None:
+        """Called once after the plugin is loaded, with shared services."""
+        self.redis = redis_pool
+        self.model = model
+        self.model_limiter = model_limiter
+        self.persona = persona
+        
+    async def generate(self, 
+                       message: Message, 
+                       context: Optional[Dict] = None) -> Optional[str]:
+        """Generate a reply with the model.
+        
+        `context` is the user's memory context, used to personalise the
+        prompt. Calls go through the shared adaptive concurrency limiter,
+        which also retries overload errors. Returns None when no model is
+        configured, the call is shed or it fails, so callers can fall back
+        to a canned reply.
+        """
+        if self.model is None:
+            return None
+            
+        if self.persona is not None:
+            messages = self.persona.build_messages(
+                message.user_id, 
+                message.text, 
+                context,
+                plugin=self.name
+            )
+        else:
+            messages = [{'role': 'user', 'content': message.text}]
+            
+        try:
+            if self.model_limiter is None:
+                return await self.model.complete(messages)
+            return await self.model_limiter.call(self.model.complete, messages)
+        except Overloaded as e:
+            logger.warning("Model call shed", plugin=self.name, error=str(e))
+        except Exception as e:
+            logger.error("Model call failed", plugin=self.name, error=str(e))
+        return None
+        
     @abstractmethod
-    async def handle_message(self, message: str) -> Optional[str]:
-        """Process a message and return a response if applicable."""
+    async def handle_message(self, 
+                             message: Message, 
+                             context: Optional[Dict] = None) -> Optional[str]:
+        """Process a message and return a response if applicable.
+        
+        `context` is the user's memory context (see MemoryManager).
+        """
         pass
         
     @abstractmethod
-    async def can_handle(self, message: str) -> bool:
+    async def can_handle(self, message: Message) -> bool:
         """Check if this plugin can handle the given message."""
         pass
         
 class PluginManager:
-    def __init__(self):
+    def __init__(self, 
+                 redis_pool=None, 
+                 model=None, 
+                 model_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+                 persona=None):
+        self.redis = redis_pool
+        self.model = model
+        self.model_limiter = model_limiter
+        self.persona = persona
         self.plugins: Dict[str, BasePlugin] = {}
         
     async def load_plugins(self):
@@ -48,6 +113,12 @@ class PluginManager:
                                 attr != BasePlugin):
                                 plugin = attr()
                                 if plugin.name:
+                                    await plugin.setup(
+                                        self.redis,
+                                        model=self.model,
+                                        model_limiter=self.model_limiter,
+                                        persona=self.persona
+                                    )
                                     self.plugins[plugin.name] = plugin
                                     logger.info(
                                         f"Loaded plugin: {plugin.name}"
@@ -62,8 +133,10 @@ class PluginManager:
         except Exception as e:
             logger.error("Error loading plugins", error=str(e))
             
-    async def get_handler(self, message: str) -> Optional[BasePlugin]:
+    @traced("plugins.get_handler")
+    async def get_handler(self, message: Message) -> Optional[BasePlugin]:
         """Find the appropriate plugin to handle a message."""
+        message = Message.coerce(message)
         for plugin in self.plugins.values():
             if await plugin.can_handle(message):
                 return plugin
@@ -1,9 +1,14 @@
 """
 Plugin for handling programming-related questions.
 """
-from typing import Optional, List
-import re
+from typing import Dict, Optional, List
+from bot.message import Message
 from plugins.base import BasePlugin
+from utils.error_signature import (
+    ErrorAnswerCache,
+    ErrorSignature,
+    extract_error_signature
+)
 
 class LearnProgrammingPlugin(BasePlugin):
     name = "learn_programming"
@@ -13,61 +18,92 @@ class LearnProgrammingPlugin(BasePlugin):
             'python', 'javascript', 'java', 'c++', 'code',
             'programming', 'function', 'class', 'algorithm'
         }
+        self.error_cache: Optional[ErrorAnswerCache] = None
         
-    async def can_handle(self, message: str) -> bool:
+    async def setup(self, redis_pool, **services) -> None:
+        await super().setup(redis_pool, **services)
+        if redis_pool is not None:
+            self.error_cache = ErrorAnswerCache(redis_pool)
+        
+    async def can_handle(self, message: Message) -> bool:
         """Check if message contains programming-related keywords."""
-        message = message.lower()
-        return any(keyword in message 
+        text = message.normalized
+        return any(keyword in text 
                   for keyword in self.programming_keywords)
                   
-    async def handle_message(self, message: str) -> Optional[str]:
+    async def handle_message(self, 
+                             message: Message, 
+                             context: Optional[Dict] = None) -> Optional[str]:
         """Handle programming-related questions."""
         # Detect programming language
         language = self._detect_language(message)
         
-        # Detect question type
-        if 'error' in message.lower():
-            return await self._handle_error_question(message, language)
-        elif 'how' in message.lower():
-            return await self._handle_how_to_question(message, language)
+        # Anything with a recognizable error goes to the error path, whatever
+        # the wording; the keyword only catches prose without a traceback
+        signature = extract_error_signature(message, language)
+        if signature is not None or 'error' in message.normalized:
+            return await self._handle_error_question(
+                message, language, signature, context
+            )
+        elif 'how' in message.normalized:
+            return await self._handle_how_to_question(message, language, context)
         
         # Default response
-        return await self._generate_programming_response(message, language)
+        return await self._generate_programming_response(
+            message, language, context
+        )
         
-    def _detect_language(self, message: str) -> Optional[str]:
+    def _detect_language(self, message: Message) -> Optional[str]:
         """Detect programming language from message."""
-        message = message.lower()
-        languages = {
-            'python': r'\b(python|py)\b',
-            'javascript': r'\b(javascript|js)\b',
-            'java': r'\bjava\b',
-            'c++': r'\b(c\+\+|cpp)\b'
-        }
-        
-        for lang, pattern in languages.items():
-            if re.search(pattern, message):
-                return lang
-        return None
+        return message.language
         
     async def _handle_error_question(self, 
-                                   message: str, 
-                                   language: Optional[str]) -> str:
+                                   message: Message, 
+                                   language: Optional[str],
+                                   signature: Optional[ErrorSignature],
+                                   context: Optional[Dict] = None) -> str:
         """Handle error-related questions."""
-        # TODO: Implement error handling logic
-        return (f"I see you're having an error in {language}. "
-                "Could you share the error message?")
+        if signature is None:
+            where = f" in {language}" if language else ""
+            return (f"I see you're having an error{where}. "
+                    "Could you share the error message?")
+            
+        # Recurring errors are answered from vetted answers, no model call
+        if self.error_cache:
+            answer = await self.error_cache.lookup(signature)
+            if answer:
+                return answer
+                
+        return await self._generate_error_response(message, signature, context)
+        
+    async def _generate_error_response(self, 
+                                     message: Message, 
+                                     signature: ErrorSignature,
+                                     context: Optional[Dict] = None) -> str:
+        """Generate a response for an error without a vetted answer."""
+        reply = await self.generate(message, context)
+        if reply:
+            return reply
+        return (f"That looks like a {signature.exception_type}"
+                f"{' in ' + signature.language if signature.language else ''}. "
+                "Let me walk you through what usually causes it...")
                 
     async def _handle_how_to_question(self, 
-                                    message: str, 
-                                    language: Optional[str]) -> str:
+                                    message: Message, 
+                                    language: Optional[str],
+                                    context: Optional[Dict] = None) -> str:
         """Handle how-to questions."""
-        # TODO: Implement how-to guidance
-        return (f"I can help you learn how to do that in {language}. "
+        reply = await self.generate(message, context)
+        if reply:
+            return reply
+        where = f" in {language}" if language else ""
+        return (f"I can help you learn how to do that{where}. "
                 "Let me break it down...")
                 
     async def _generate_programming_response(self, 
-                                          message: str, 
-                                          language: Optional[str]) -> str:
+                                          message: Message, 
+                                          language: Optional[str],
+                                          context: Optional[Dict] = None) -> str:
         """Generate a general programming-related response."""
-        # TODO: Implement Venice API call for programming help
-        return "I'll help you with your programming question..."
\ No newline at end of file
+        reply = await self.generate(message, context)
+        return reply or "I'll help you with your programming question..."
\ No newline at end of file
@@ -1,70 +1,90 @@
 """
 Plugin for handling relationship advice questions.
 """
-from typing import Optional
-import re
+from typing import Dict, Optional
+from bot.message import Message
 from plugins.base import BasePlugin
 
+RELATIONSHIP_KEYWORDS = frozenset({
+    'relationship', 'dating', 'partner', 'marriage',
+    'boyfriend', 'girlfriend', 'spouse', 'breakup'
+})
+CRISIS_KEYWORDS = frozenset({'suicide', 'hurt', 'abuse', 'violence'})
+
+CRISIS_RESPONSE = (
+    "I notice this might be a serious situation. "
+    "Please remember:\n\n"
+    "1. Your safety is the top priority\n"
+    "2. Contact emergency services if you're in danger\n"
+    "3. National Crisis Hotline: 988\n"
+    "4. Consider speaking with a professional counselor\n\n"
+    "Would you like me to provide more specific resources?"
+)
+
+def is_crisis(message: Message) -> bool:
+    """Cheap check, run at ingestion, for relationship messages in crisis."""
+    text = message.normalized
+    return (any(word in text for word in CRISIS_KEYWORDS) and
+            any(keyword in text for keyword in RELATIONSHIP_KEYWORDS))
+
 class RelationshipsPlugin(BasePlugin):
     name = "relationships"
     
     def __init__(self):
-        self.relationship_keywords = {
-            'relationship', 'dating', 'partner', 'marriage',
-            'boyfriend', 'girlfriend', 'spouse', 'breakup'
-        }
+        self.relationship_keywords = RELATIONSHIP_KEYWORDS
         
-    async def can_handle(self, message: str) -> bool:
+    async def can_handle(self, message: Message) -> bool:
         """Check if message is relationship-related."""
-        message = message.lower()
-        return any(keyword in message 
+        text = message.normalized
+        return any(keyword in text 
                   for keyword in self.relationship_keywords)
                   
-    async def handle_message(self, message: str) -> Optional[str]:
+    async def handle_message(self, 
+                             message: Message, 
+                             context: Optional[Dict] = None) -> Optional[str]:
         """Handle relationship advice requests."""
         message_type = self._categorize_message(message)
         
         if message_type == 'crisis':
             return self._handle_crisis()
         elif message_type == 'advice':
-            return await self._generate_advice(message)
+            return await self._generate_advice(message, context)
         else:
-            return await self._generate_general_response(message)
+            return await self._generate_general_response(message, context)
             
-    def _categorize_message(self, message: str) -> str:
+    def _categorize_message(self, message: Message) -> str:
         """Categorize the type of relationship question."""
-        message = message.lower()
+        text = message.normalized
         
-        crisis_keywords = {'suicide', 'hurt', 'abuse', 'violence'}
-        if any(word in message for word in crisis_keywords):
+        if any(word in text for word in CRISIS_KEYWORDS):
             return 'crisis'
             
         advice_keywords = {'should i', 'what should', 'how do i'}
-        if any(phrase in message for phrase in advice_keywords):
+        if any(phrase in text for phrase in advice_keywords):
             return 'advice'
             
         return 'general'
         
     def _handle_crisis(self) -> str:
         """Handle crisis situations with appropriate resources."""
-        return (
-            "I notice this might be a serious situation. "
-            "Please remember:\n\n"
-            "1. Your safety is the top priority\n"
-            "2. Contact emergency services if you're in danger\n"
-            "3. National Crisis Hotline: 988\n"
-            "4. Consider speaking with a professional counselor\n\n"
-            "Would you like me to provide more specific resources?"
-        )
+        return CRISIS_RESPONSE
         
-    async def _generate_advice(self, message: str) -> str:
+    async def _generate_advice(self, 
+                               message: Message, 
+                               context: Optional[Dict] = None) -> str:
         """Generate relationship advice based on the question."""
-        # TODO: Implement Venice API call for relationship advice
+        reply = await self.generate(message, context)
+        if reply:
+            return reply
         return ("I understand you're looking for relationship advice. "
                 "Let me help you think through this...")
                 
-    async def _generate_general_response(self, message: str) -> str:
+    async def _generate_general_response(self, 
+                                         message: Message, 
+                                         context: Optional[Dict] = None) -> str:
         """Generate a general response for relationship topics."""
-        # TODO: Implement Venice API call for general response
+        reply = await self.generate(message, context)
+        if reply:
+            return reply
         return ("I hear you talking about your relationship. "
                 "Would you like to tell me more about the situation?")
\ No newline at end of file
@@ -0,0 +1,32 @@
+"""
+Tests for interaction logging into the analytics rollups.
+"""
+import asyncio
+from benchmarks.fakes import FakeRedis
+from bot.analytics import AnalyticsEngine
+from bot.rollups import summarize
+
+
+def test_unscored_interactions_do_not_skew_sentiment():
+    async def run():
+        analytics = AnalyticsEngine(FakeRedis())
+        try:
+            await analytics.log_interaction('u1', "scored", "reply", 0.1,
+                                            sentiment_score=0.8)
+            # The crisis lane logs without a score
+            await analytics.log_interaction('u2', "unscored", "reply", 0.1)
+            fields = {}
+            for bucket in analytics.rollups._pending.values():
+                for field, value in bucket.items():
+                    fields[field] = fields.get(field, 0.0) + value
+            return fields, analytics.current_interactions
+        finally:
+            for task in analytics.tasks:
+                task.cancel()
+            await asyncio.gather(*analytics.tasks, return_exceptions=True)
+
+    fields, interactions = asyncio.run(run())
+    summary = summarize(fields)
+    assert summary['interactions'] == 2
+    assert summary['avg_sentiment'] == 0.8
+    assert interactions[1].sentiment_score is None
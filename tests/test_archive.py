@@ -0,0 +1,121 @@
+"""
+Tests for the Redis -> Postgres archive job.
+"""
+import asyncio
+import json
+from dataclasses import replace
+from benchmarks.fakes import FakeRedis
+from benchmarks.run import Scenario, bench_settings
+from bot.archive import ArchiveJob
+from bot.bot import SimpiBot
+from bot.memory import MemoryManager
+
+
+class FakeStore:
+    """Records copied rows; optionally fails or runs a hook mid-COPY."""
+
+    def __init__(self):
+        self.pool = object()
+        self.rows = []
+        self.fail = False
+        self.during_copy = None
+
+    async def copy_interactions(self, records):
+        if self.during_copy is not None:
+            await self.during_copy()
+        if self.fail:
+            raise RuntimeError("connection lost")
+        self.rows.extend(records)
+
+    async def copy_faqs(self, records):
+        self.rows.extend(records)
+
+
+def interaction(n):
+    return json.dumps({'prompt': f"q{n}", 'response': f"a{n}", 'timestamp': n})
+
+
+def archived_prompts(store):
+    return [row[4] for row in store.rows]
+
+
+def test_drain_survives_concurrent_push_and_trim():
+    async def scenario():
+        redis = FakeRedis()
+        store = FakeStore()
+        job = ArchiveJob(redis, store, interactions_keep=2, batch_size=3)
+        key = 'interactions:u1'
+        for n in range(6):
+            await redis.rpush(key, interaction(n))
+
+        async def concurrent_writer():
+            # A new interaction plus the cap trim MemoryManager would do
+            await redis.rpush(key, interaction(100))
+            await redis.ltrim(key, -2, -1)
+
+        store.during_copy = concurrent_writer
+        await job.archive_once()
+        store.during_copy = None
+        return archived_prompts(store), await redis.lrange(key, 0, -1)
+
+    archived, remaining = asyncio.run(scenario())
+    # The first batch was moved before the concurrent trim, so nothing
+    # in it is lost, and nothing is archived twice
+    assert archived[:3] == ['q0', 'q1', 'q2']
+    assert len(archived) == len(set(archived))
+    assert len(remaining) == 2
+
+
+def test_failed_copy_keeps_entries_and_retries_them():
+    async def scenario():
+        redis = FakeRedis()
+        store = FakeStore()
+        job = ArchiveJob(redis, store, interactions_keep=1)
+        for n in range(4):
+            await redis.rpush('interactions:u1', interaction(n))
+
+        store.fail = True
+        try:
+            await job.archive_once()
+        except RuntimeError:
+            pass
+        staged = await redis.lrange('archive:staging:interactions:u1', 0, -1)
+
+        store.fail = False
+        await job.archive_once()
+        leftover = await redis.lrange('archive:staging:interactions:u1', 0, -1)
+        return staged, archived_prompts(store), leftover
+
+    staged, archived, leftover = asyncio.run(scenario())
+    assert len(staged) == 3
+    assert archived == ['q0', 'q1', 'q2']
+    assert leftover == []
+
+
+def test_memory_cap_is_optional():
+    async def scenario():
+        redis = FakeRedis()
+        capped = MemoryManager(redis, max_interactions=2)
+        uncapped = MemoryManager(redis, max_interactions=None)
+        for n in range(4):
+            await capped.log_interaction('capped', {'prompt': f"q{n}"})
+            await uncapped.log_interaction('uncapped', {'prompt': f"q{n}"})
+        return (await redis.llen('interactions:capped'),
+                await redis.llen('interactions:uncapped'))
+
+    assert asyncio.run(scenario()) == (2, 4)
+
+
+def test_archiving_keeps_a_safety_cap():
+    async def scenario():
+        settings = bench_settings(Scenario(workers=1), 'fake://')
+        settings = replace(
+            settings,
+            database=replace(settings.database, postgres_url='postgresql://x'),
+            archive_redis_cap=3000
+        )
+        bot = SimpiBot(settings, FakeRedis(), reddit=object(), model=object())
+        return bot.memory.max_interactions
+
+    # Well above what the archive keeps, but still bounded if Postgres is down
+    assert asyncio.run(scenario()) == 3000
@@ -0,0 +1,59 @@
+"""
+Tests for SimpiBot's ingestion: overflow and the crisis lane rate limit.
+"""
+import asyncio
+from dataclasses import replace
+from benchmarks.fakes import FakeRedis
+from benchmarks.run import Scenario, bench_settings
+from bot.bot import SimpiBot
+from bot.message import Message
+
+CRISIS_TEXT = "My boyfriend hurt me last night and I don't know what to do"
+
+
+def make_bot(**overrides) -> SimpiBot:
+    settings = replace(bench_settings(Scenario(workers=1), 'fake://'), **overrides)
+    return SimpiBot(settings, FakeRedis(), reddit=object(), model=object())
+
+
+def test_full_queue_holds_overflow_in_order():
+    async def run():
+        bot = make_bot(queue_size=2)
+        for i in range(5):
+            bot.enqueue(Message(f"hello {i}", user_id="u", item_id=str(i)))
+        assert (bot.queue.qsize(), len(bot.overflow)) == (2, 3)
+
+        texts = []
+        while not bot.queue.empty():
+            texts.append((await bot.queue.get()).text)
+            bot._drain_overflow()
+        return texts
+
+    assert asyncio.run(run()) == [f"hello {i}" for i in range(5)]
+
+
+def test_crisis_lane_is_rate_limited_per_user():
+    async def run():
+        bot = make_bot(crisis_rate_limit=2)
+        for i in range(4):
+            bot.enqueue(Message(CRISIS_TEXT, user_id="flood", item_id=f"f{i}"))
+        bot.enqueue(Message(CRISIS_TEXT, user_id="other", item_id="o"))
+        return bot.crisis_queue.qsize(), bot.queue.qsize()
+
+    assert asyncio.run(run()) == (3, 2)
+
+
+def test_crisis_slo_is_exported():
+    async def run():
+        bot = make_bot(crisis_slo_seconds=2.0)
+        bot.crisis_slo.record(0.5)
+        bot.crisis_slo.record(3.0)
+        await bot.report_metrics()
+        return await bot.redis.hgetall('metrics:crisis_slo')
+
+    slo = asyncio.run(run())
+    assert slo['total'] == '2'
+    assert slo['breaches'] == '1'
+    assert float(slo['compliance']) == 0.5
+    assert slo['meeting_objective'] == '0'
+    assert float(slo['p99_ms']) == 3000.0
@@ -0,0 +1,113 @@
+"""
+Tests for the adaptive concurrency limiter.
+"""
+import asyncio
+import random
+import pytest
+from utils.concurrency import AdaptiveConcurrencyLimiter
+
+
+class StatusError(Exception):
+    def __init__(self, status):
+        super().__init__(f"status {status}")
+        self.status = status
+
+
+def saturated_calls(limiter, latencies):
+    """Release one call per latency while every slot is in use."""
+    async def scenario():
+        for latency in latencies:
+            while limiter.in_flight < limiter.current_limit:
+                await limiter.acquire()
+            limiter.release(latency)
+
+    asyncio.run(scenario())
+
+
+def failing_call(limiter, error):
+    async def scenario():
+        with pytest.raises(type(error)):
+            async with limiter.slot():
+                raise error
+
+    asyncio.run(scenario())
+
+
+def test_limit_grows_under_jittered_latency():
+    rng = random.Random(7)
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=64)
+    # Stable ~200ms calls with heavy jitter, including 3x outliers
+    latencies = [max(0.01, rng.gauss(0.2, 0.08)) for _ in range(2000)]
+    latencies[::50] = [0.6] * len(latencies[::50])
+
+    saturated_calls(limiter, latencies)
+
+    assert limiter.overloads == 0
+    assert limiter.current_limit > 16
+
+
+def test_limit_shrinks_on_sustained_latency_rise():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=32, decrease_cooldown=0)
+    saturated_calls(limiter, [0.2] * 200)
+    before = limiter.current_limit
+
+    saturated_calls(limiter, [1.0] * 20)
+
+    assert limiter.overloads >= 1
+    assert limiter.current_limit < before
+
+
+@pytest.mark.parametrize('error', [
+    StatusError(429),
+    StatusError(503),
+    asyncio.TimeoutError(),
+])
+def test_limit_shrinks_on_overload(error):
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=16, decrease_cooldown=0)
+
+    failing_call(limiter, error)
+
+    assert limiter.current_limit == 8
+    assert limiter.in_flight == 0
+
+
+def test_other_errors_do_not_shrink_limit():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=16, decrease_cooldown=0)
+
+    failing_call(limiter, StatusError(400))
+
+    assert limiter.current_limit == 16
+
+
+def test_call_retries_overloads_outside_the_slot():
+    limiter = AdaptiveConcurrencyLimiter(
+        initial_limit=16,
+        decrease_cooldown=0,
+        retry_delay=0.001
+    )
+    attempts = []
+
+    async def complete():
+        attempts.append(limiter.in_flight)
+        if len(attempts) < 3:
+            raise StatusError(429)
+        return "ok"
+
+    assert asyncio.run(limiter.call(complete)) == "ok"
+    # Each attempt held exactly one slot, and both 429s cut the limit
+    assert attempts == [1, 1, 1]
+    assert limiter.current_limit == 4
+    assert limiter.in_flight == 0
+
+
+def test_call_does_not_retry_other_errors():
+    limiter = AdaptiveConcurrencyLimiter(retry_delay=0.001)
+    attempts = []
+
+    async def complete():
+        attempts.append(1)
+        raise StatusError(400)
+
+    with pytest.raises(StatusError):
+        asyncio.run(limiter.call(complete))
+    assert len(attempts) == 1
@@ -0,0 +1,141 @@
+"""
+Tests for error fingerprinting and the error answer cache.
+"""
+import asyncio
+import pytest
+from benchmarks.fakes import CountingRedis, FakeRedis
+from bot.message import Message
+from utils.error_signature import ErrorAnswerCache, extract_error_signature
+
+# Pairs of the same error reported with different identifiers, paths,
+# line numbers and values
+SAME_ERROR_PAIRS = {
+    'python_traceback': (
+        "Help!\n"
+        "```\n"
+        "Traceback (most recent call last):\n"
+        "  File \"/home/alice/proj/main.py\", line 12, in <module>\n"
+        "    print(items[5])\n"
+        "IndexError: list index out of range\n"
+        "```",
+        "```\n"
+        "Traceback (most recent call last):\n"
+        "  File \"C:\\Users\\bob\\code\\app.py\", line 40, in run\n"
+        "    x = data[idx]\n"
+        "IndexError: list index out of range\n"
+        "```",
+    ),
+    'python_key_error': (
+        "```\n"
+        "Traceback (most recent call last):\n"
+        "  File \"/srv/app/views.py\", line 7, in get\n"
+        "KeyError: 'username'\n"
+        "```",
+        "```\n"
+        "Traceback (most recent call last):\n"
+        "  File \"/home/me/bot.py\", line 99, in handle\n"
+        "KeyError: 'user_id'\n"
+        "```",
+    ),
+    'java_npe': (
+        "Exception in thread \"main\" java.lang.NullPointerException: "
+        "Cannot invoke \"String.length()\" because \"name\" is null\n"
+        "\tat com.acme.App.main(App.java:14)",
+        "Exception in thread \"main\" java.lang.NullPointerException: "
+        "Cannot invoke \"String.trim()\" because \"title\" is null\n"
+        "\tat org.foo.Bar.run(Bar.java:88)",
+    ),
+    'java_index': (
+        "java.lang.ArrayIndexOutOfBoundsException: Index 5 out of bounds for length 3",
+        "java.lang.ArrayIndexOutOfBoundsException: Index 10 out of bounds for length 2",
+    ),
+    'javascript_not_a_function': (
+        "Uncaught TypeError: user.getName is not a function at app.js:12:5",
+        "Uncaught TypeError: this.props.onClick is not a function "
+        "at /src/components/Button.js:33:9",
+    ),
+    'javascript_not_defined': (
+        "ReferenceError: foo is not defined\n    at main.js:3:1",
+        "ReferenceError: myVariable is not defined\n    at /app/index.js:20:7",
+    ),
+}
+
+
+@pytest.mark.parametrize('first,second', SAME_ERROR_PAIRS.values(),
+                         ids=list(SAME_ERROR_PAIRS))
+def test_same_error_has_same_fingerprint(first, second):
+    a = extract_error_signature(Message(first))
+    b = extract_error_signature(Message(second))
+    assert a is not None and b is not None
+    assert a.fingerprint == b.fingerprint
+
+
+def test_languages_and_types_are_detected():
+    python = extract_error_signature(Message(SAME_ERROR_PAIRS['python_traceback'][0]))
+    java = extract_error_signature(Message(SAME_ERROR_PAIRS['java_npe'][0]))
+    js = extract_error_signature(Message(SAME_ERROR_PAIRS['javascript_not_a_function'][0]))
+    assert (python.language, python.exception_type) == ('python', 'IndexError')
+    assert (java.language, java.exception_type) == ('java', 'NullPointerException')
+    assert (js.language, js.exception_type) == ('javascript', 'TypeError')
+
+
+def test_different_errors_have_different_fingerprints():
+    fingerprints = {
+        extract_error_signature(Message(first)).fingerprint
+        for first, _ in SAME_ERROR_PAIRS.values()
+    }
+    assert len(fingerprints) == len(SAME_ERROR_PAIRS)
+
+
+def test_message_without_error_has_no_signature():
+    assert extract_error_signature(
+        Message("How do I reverse a list in python without reversed()?")
+    ) is None
+
+
+def test_lookup_miss_records_stats_in_one_round_trip():
+    redis = CountingRedis(FakeRedis())
+    cache = ErrorAnswerCache(redis)
+    signature = extract_error_signature(Message(SAME_ERROR_PAIRS['java_index'][0]))
+
+    assert asyncio.run(cache.lookup(signature)) is None
+    assert redis.commands == {'get': 1, 'pipeline': 1}
+    assert asyncio.run(cache.get_stats(signature.fingerprint)) == {'hits': 0, 'misses': 1}
+    unanswered = asyncio.run(cache.top_unanswered())
+    assert unanswered[0]['fingerprint'] == signature.fingerprint
+    assert unanswered[0]['signature']['exception_type'] == 'ArrayIndexOutOfBoundsException'
+    assert redis.redis.expiry[f'errors:stats:{signature.fingerprint}']
+
+
+def test_lookup_hit_returns_vetted_answer():
+    cache = ErrorAnswerCache(FakeRedis())
+    signature = extract_error_signature(Message(SAME_ERROR_PAIRS['python_traceback'][0]))
+    other = extract_error_signature(Message(SAME_ERROR_PAIRS['python_traceback'][1]))
+
+    async def run():
+        await cache.lookup(signature)
+        await cache.store_answer(signature, "Check the list length first.")
+        return await cache.lookup(other)
+
+    assert asyncio.run(run()) == "Check the list length first."
+    assert asyncio.run(cache.get_stats(signature.fingerprint)) == {'hits': 1, 'misses': 1}
+    assert asyncio.run(cache.top_unanswered()) == []
+
+
+def test_unanswered_errors_expire_by_day():
+    redis = FakeRedis()
+    cache = ErrorAnswerCache(redis, miss_window_days=7)
+
+    async def run():
+        for i, text in enumerate(SAME_ERROR_PAIRS.values()):
+            signature = extract_error_signature(Message(text[0]))
+            for _ in range(i + 1):
+                await cache.lookup(signature)
+        return await cache.top_unanswered(limit=2)
+
+    top = asyncio.run(run())
+    assert [e['misses'] for e in top] == [6, 5]
+    daily = [key for key in redis.data if key.startswith('errors:misses:')
+             and key != 'errors:misses:recent']
+    assert len(daily) == 1
+    assert redis.expiry[daily[0]] > 0
@@ -0,0 +1,74 @@
+"""
+Tests for routing in the learn-programming plugin.
+"""
+import asyncio
+import pytest
+from benchmarks.fakes import FakeRedis
+from bot.message import Message
+from plugins.learnprogramming import LearnProgrammingPlugin
+from utils.error_signature import extract_error_signature
+
+JAVA_NPE = (
+    "My java code crashes:\n"
+    "Exception in thread \"main\" java.lang.NullPointerException\n"
+    "\tat Main.main(Main.java:5)"
+)
+JAVA_NPE_HOW = "How do I fix this in java? " + JAVA_NPE
+PYTHON_INTERRUPT = (
+    "My python script stops with\n"
+    "```\n"
+    "Traceback (most recent call last):\n"
+    "  File \"/home/me/loop.py\", line 4, in <module>\n"
+    "    time.sleep(1)\n"
+    "KeyboardInterrupt\n"
+    "```"
+)
+
+
+class CountingModel:
+    def __init__(self):
+        self.calls = 0
+
+    async def complete(self, messages):
+        self.calls += 1
+        return "model reply"
+
+
+def plugin_with(model=None):
+    plugin = LearnProgrammingPlugin()
+    asyncio.run(plugin.setup(FakeRedis(), model=model))
+    return plugin
+
+
+@pytest.mark.parametrize('text', [JAVA_NPE, JAVA_NPE_HOW, PYTHON_INTERRUPT],
+                         ids=['java_npe', 'java_npe_how', 'python_interrupt'])
+def test_errors_without_the_word_error_use_the_answer_cache(text):
+    model = CountingModel()
+    plugin = plugin_with(model)
+    signature = extract_error_signature(Message(text))
+    assert signature is not None
+
+    async def run():
+        await plugin.error_cache.store_answer(signature, "vetted answer")
+        return await plugin.handle_message(Message(text))
+
+    assert asyncio.run(run()) == "vetted answer"
+    assert model.calls == 0
+
+
+def test_uncached_error_falls_back_to_error_reply():
+    plugin = plugin_with(model=None)
+
+    reply = asyncio.run(plugin.handle_message(Message(JAVA_NPE)))
+
+    assert "NullPointerException" in reply
+
+
+def test_error_prose_without_traceback_asks_for_it():
+    plugin = plugin_with(model=None)
+
+    reply = asyncio.run(plugin.handle_message(
+        Message("I get an error in my python code")
+    ))
+
+    assert "Could you share the error message?" in reply
@@ -0,0 +1,66 @@
+"""
+Tests for cross-user near-duplicate spam detection in moderation.
+"""
+import asyncio
+from bot.message import Message
+from bot.moderation import ModerationSystem
+
+TRACEBACK = (
+    "I keep getting this when I run my script, any idea?\n"
+    "```\n"
+    "Traceback (most recent call last):\n"
+    "  File \"/home/me/main.py\", line 3, in <module>\n"
+    "    import requests\n"
+    "ModuleNotFoundError: No module named 'requests'\n"
+    "```\n"
+    "Docs I tried: https://docs.python.org/3/installing/"
+)
+QUESTION = "How do I reverse a list in Python without modifying the original list?"
+CAMPAIGN = ("Make easy money from home every single day, sign up now at "
+            "https://example.com/earn?ref={n}")
+TEXT_CAMPAIGN = "Make easy money from home every single day, DM me on telegram @xyz{n}"
+
+
+def verdicts(texts):
+    """Moderation results and flag reasons for one message per distinct user."""
+    async def scenario():
+        moderation = ModerationSystem()
+        results = [
+            await moderation.check_message(Message(text, user_id=f"user{i}",
+                                                   item_id=f"t1_{i}"))
+            for i, text in enumerate(texts)
+        ]
+        flags = [
+            flag.reason
+            for user_flags in (await moderation.get_flagged_content()).values()
+            for flag in user_flags
+        ]
+        return results, flags
+
+    return asyncio.run(scenario())
+
+
+def test_recurring_question_is_flagged_but_never_blocked():
+    results, flags = verdicts([QUESTION] * 20)
+    assert all(results)
+    assert flags == ['near_duplicate'] * 16
+
+
+def test_recurring_traceback_with_link_is_never_flagged_or_blocked():
+    results, flags = verdicts([TRACEBACK] * 20)
+    assert all(results)
+    assert flags == []
+
+
+def test_link_free_campaign_is_detected():
+    results, flags = verdicts([TEXT_CAMPAIGN.format(n=n) for n in range(8)])
+    assert all(results)
+    # Flagged from the fifth distinct user on
+    assert flags == ['near_duplicate'] * 4
+
+
+def test_link_campaign_is_blocked_from_min_users():
+    results, flags = verdicts([CAMPAIGN.format(n=n) for n in range(8)])
+    # Allowed until five distinct users have posted it
+    assert results == [True] * 4 + [False] * 4
+    assert flags == ['near_duplicate'] * 4
@@ -0,0 +1,105 @@
+"""
+Tests for the memory-mapped spool: replay, torn writes and compaction.
+"""
+import asyncio
+import os
+from utils.spool import HEADER, Spool
+
+
+def open_spool(path, **kwargs):
+    spool = Spool(str(path), initial_size=4096, **kwargs)
+    return spool, spool.open()
+
+
+def reopen(spool):
+    spool.close()
+    return open_spool(spool.path)
+
+
+def test_ack_replay(tmp_path):
+    spool, pending = open_spool(tmp_path / 'spool.log')
+    assert pending == {}
+
+    first = spool.append('queue', {'n': 1})
+    second = spool.append('queue', {'n': 2})
+    third = spool.append('analytics', {'n': 3})
+    spool.ack(second)
+
+    spool, pending = reopen(spool)
+    assert pending == {first: ('queue', {'n': 1}), third: ('analytics', {'n': 3})}
+    assert spool.pending_for('queue') == [(first, {'n': 1})]
+
+    # Ids keep increasing across restarts, so old acks cannot hit new records
+    assert spool.append('queue', {'n': 4}) > third
+    spool.close()
+
+
+def test_torn_tail_is_discarded(tmp_path):
+    spool, _ = open_spool(tmp_path / 'spool.log')
+    first = spool.append('queue', {'n': 1})
+    torn_at = spool._offset
+    spool.append('queue', {'n': 2})
+    spool.close()
+
+    # Corrupt the last record's payload, as a crash mid-write would
+    with open(spool.path, 'r+b') as f:
+        f.seek(torn_at + HEADER.size)
+        f.write(b'X')
+
+    spool, pending = open_spool(spool.path)
+    assert pending == {first: ('queue', {'n': 1})}
+
+    # New records overwrite the torn tail and replay normally
+    later = spool.append('queue', {'n': 3})
+    spool, pending = reopen(spool)
+    assert pending == {first: ('queue', {'n': 1}), later: ('queue', {'n': 3})}
+    spool.close()
+
+
+def test_compaction_keeps_only_live_records(tmp_path):
+    spool, _ = open_spool(tmp_path / 'spool.log')
+    ids = [spool.append('queue', {'n': n, 'pad': 'x' * 50}) for n in range(100)]
+    for record_id in ids[:-3]:
+        spool.ack(record_id)
+    before = spool._offset
+    assert spool.should_compact()
+
+    spool.compact()
+
+    assert spool._offset < before
+    assert not spool.should_compact()
+    spool, pending = reopen(spool)
+    assert sorted(pending) == ids[-3:]
+    assert not os.path.exists(f"{spool.path}.compact")
+    spool.close()
+
+
+def test_compaction_carries_over_concurrent_appends_and_acks(tmp_path):
+    spool, _ = open_spool(tmp_path / 'spool.log')
+    kept = spool.append('queue', {'n': 1})
+    acked_later = spool.append('queue', {'n': 2})
+
+    # Records change while the compacted file is being written
+    live = list(spool.pending.items())
+    compacted, end = spool._write_compacted(live)
+    spool.ack(acked_later)
+    added = spool.append('queue', {'n': 3})
+    spool._finish_compaction(live, compacted, end)
+
+    spool, pending = reopen(spool)
+    assert pending == {kept: ('queue', {'n': 1}), added: ('queue', {'n': 3})}
+    spool.close()
+
+
+def test_maintain_compacts_off_the_loop(tmp_path):
+    spool, _ = open_spool(tmp_path / 'spool.log')
+    ids = [spool.append('queue', {'n': n, 'pad': 'x' * 50}) for n in range(100)]
+    for record_id in ids[:-1]:
+        spool.ack(record_id)
+
+    asyncio.run(spool.maintain())
+
+    assert not spool.should_compact()
+    spool, pending = reopen(spool)
+    assert list(pending) == ids[-1:]
+    spool.close()
@@ -4,7 +4,7 @@ Exponential backoff decorator for rate-limited operations.
 import asyncio
 import functools
 import random
-from typing import Callable, Any
+from typing import Callable, Any, Optional
 import structlog
 
 logger = structlog.get_logger()
@@ -12,7 +12,8 @@ logger = structlog.get_logger()
 def exponential_backoff(
     start_delay: float = 1.0,
     max_delay: float = 60.0,
-    max_retries: int = 5
+    max_retries: int = 5,
+    retry_if: Optional[Callable[[Exception], bool]] = None
 ):
     """
     Decorator for exponential backoff retry logic.
@@ -21,6 +22,8 @@ def exponential_backoff(
         start_delay: Initial delay in seconds
         max_delay: Maximum delay between retries
         max_retries: Maximum number of retry attempts
+        retry_if: Only retry errors this returns True for; others are
+            raised at once
     """
     def decorator(func: Callable) -> Callable:
         @functools.wraps(func)
@@ -33,6 +36,8 @@ def exponential_backoff(
                     return await func(*args, **kwargs)
                     
                 except Exception as e:
+                    if retry_if is not None and not retry_if(e):
+                        raise
                     retries += 1
                     
                     if retries >= max_retries:
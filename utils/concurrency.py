@@ -0,0 +1,237 @@
+"""
+Adaptive (AIMD) concurrency limiting for calls to rate-limited backends.
+"""
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+import asyncio
+import contextlib
+import time
+from collections import deque
+import structlog
+from utils.backoff import exponential_backoff
+
+logger = structlog.get_logger()
+
+# HTTP statuses that mean the backend is overloaded rather than broken
+OVERLOAD_STATUSES = {429, 503}
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed instead of queued."""
+
+
+class AdaptiveConcurrencyLimiter:
+    """Limits in-flight calls with additive increase, multiplicative decrease.
+
+    The limit grows by about one slot per round trip while calls succeed at
+    normal latency, and is cut multiplicatively on timeouts, overload
+    responses or a sustained latency rise: a short-window moving average
+    staying well above the long-window one for several calls in a row.
+    Jitter moves the short average too little to trigger a cut.
+    Callers over the limit wait in a bounded FIFO queue; when the queue is
+    full or the wait times out, the call is shed with Overloaded.
+    """
+
+    def __init__(self,
+                 name: str = "model",
+                 initial_limit: int = 8,
+                 min_limit: int = 1,
+                 max_limit: int = 64,
+                 backoff_ratio: float = 0.5,
+                 latency_tolerance: float = 2.0,
+                 max_queue: int = 100,
+                 queue_timeout: float = 10.0,
+                 decrease_cooldown: float = 1.0,
+                 short_window: int = 10,
+                 long_window: int = 200,
+                 sustain: int = 5,
+                 retry_delay: float = 1.0):
+        """
+        Args:
+            name: Name used in logs and metrics
+            initial_limit: Starting number of concurrent calls
+            min_limit: Lowest the limit can be cut to
+            max_limit: Highest the limit can grow to
+            backoff_ratio: Multiplier applied to the limit on overload
+            latency_tolerance: Recent average latency above this multiple
+                of the baseline counts as overload
+            max_queue: Callers allowed to wait for a slot before shedding
+            queue_timeout: Seconds a caller waits for a slot before shedding
+            decrease_cooldown: Minimum seconds between two decreases, so
+                one burst of failures only cuts the limit once
+            short_window: Calls averaged for the recent latency
+            long_window: Calls averaged for the baseline latency
+            sustain: Consecutive calls the recent latency must stay above
+                the tolerance before the limit is cut
+            retry_delay: Initial backoff before call() retries an overload
+        """
+        self.name = name
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.latency_tolerance = latency_tolerance
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.decrease_cooldown = decrease_cooldown
+        self.short_window = short_window
+        self.sustain = sustain
+        self.retry_delay = retry_delay
+        # Exponentially weighted moving averages over ~N calls
+        self._short_alpha = 2 / (short_window + 1)
+        self._long_alpha = 2 / (long_window + 1)
+
+        self.in_flight = 0
+        self.shed = 0
+        self.overloads = 0
+        self._samples = 0
+        self._recent_latency = 0.0
+        self._baseline_latency = 0.0
+        self._above = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._last_decrease = 0.0
+
+    @property
+    def current_limit(self) -> int:
+        return max(self.min_limit, int(self.limit))
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self):
+        """Wait for a free slot, or raise Overloaded."""
+        if self.in_flight < self.current_limit and not self._waiters:
+            self.in_flight += 1
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            self.shed += 1
+            raise Overloaded(f"{self.name} queue is full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.shed += 1
+            raise Overloaded(f"{self.name} queue wait timed out")
+        except asyncio.CancelledError:
+            # A slot may have been handed over just before cancellation
+            if waiter.done() and not waiter.cancelled():
+                self.in_flight -= 1
+                self._wake()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def release(self, latency: Optional[float] = None, overloaded: bool = False):
+        """Free a slot and adjust the limit from the call's outcome."""
+        saturated = bool(self._waiters) or self.in_flight >= self.current_limit
+        self.in_flight -= 1
+
+        if overloaded:
+            self._decrease("overload")
+        elif latency is not None:
+            if self._observe(latency):
+                self._above = 0
+                self._decrease("latency")
+            elif saturated:
+                # About +1 per round trip's worth of successful calls
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+        self._wake()
+
+    def _observe(self, latency: float) -> bool:
+        """Update the latency averages; True on a sustained rise."""
+        self._samples += 1
+        if self._samples == 1:
+            self._recent_latency = self._baseline_latency = latency
+            return False
+        self._recent_latency += self._short_alpha * (latency - self._recent_latency)
+        self._baseline_latency += self._long_alpha * (latency - self._baseline_latency)
+
+        if (self._samples >= self.short_window and
+                self._recent_latency > self._baseline_latency * self.latency_tolerance):
+            self._above += 1
+        else:
+            self._above = 0
+        return self._above >= self.sustain
+
+    def _decrease(self, reason: str):
+        now = time.monotonic()
+        if now - self._last_decrease < self.decrease_cooldown:
+            return
+        self._last_decrease = now
+        self.overloads += 1
+        previous = self.current_limit
+        self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+        logger.warning(
+            "Concurrency limit decreased",
+            limiter=self.name,
+            reason=reason,
+            previous_limit=previous,
+            limit=self.current_limit,
+            queue_depth=self.queue_depth
+        )
+
+    def _wake(self):
+        """Hand free slots to waiters in FIFO order."""
+        while self._waiters and self.in_flight < self.current_limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(True)
+
+    @staticmethod
+    def is_overload(error: BaseException) -> bool:
+        """Whether an error means the backend is overloaded."""
+        if isinstance(error, asyncio.TimeoutError):
+            return True
+        return getattr(error, 'status', None) in OVERLOAD_STATUSES
+
+    @contextlib.asynccontextmanager
+    async def slot(self):
+        """Hold a slot for the duration of one call."""
+        await self.acquire()
+        started = time.monotonic()
+        latency = None
+        overloaded = False
+        try:
+            yield
+            latency = time.monotonic() - started
+        except BaseException as e:
+            overloaded = self.is_overload(e)
+            raise
+        finally:
+            self.release(latency, overloaded)
+
+    async def call(self, func: Callable[..., Awaitable[Any]], *args: Any,
+                   retries: int = 3, **kwargs: Any) -> Any:
+        """Run `func` in a slot, retrying overload errors with backoff.
+
+        Each attempt takes its own slot, so every 429, 503 or timeout
+        reaches release() and cuts the limit, and backoff sleeps do not
+        hold a slot. Other errors and Overloaded are raised at once.
+        """
+        @exponential_backoff(
+            start_delay=self.retry_delay,
+            max_retries=retries,
+            retry_if=self.is_overload
+        )
+        async def attempt():
+            async with self.slot():
+                return await func(*args, **kwargs)
+
+        return await attempt()
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            'limit': self.current_limit,
+            'in_flight': self.in_flight,
+            'queue_depth': self.queue_depth,
+            'shed': self.shed,
+            'overloads': self.overloads,
+            'recent_latency': self._recent_latency,
+            'baseline_latency': self._baseline_latency,
+        }
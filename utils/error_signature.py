@@ -0,0 +1,232 @@
+"""
+Error and traceback fingerprinting, with a Redis-backed answer cache.
+
+Most error questions are the same few hundred errors with different
+variable names and file paths. Stripping those out gives a stable
+fingerprint that vetted answers can be keyed on.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+import hashlib
+import json
+import re
+import time
+from dataclasses import dataclass, asdict
+import structlog
+from bot.message import Message
+
+logger = structlog.get_logger()
+
+# "SomeError: message" / "java.lang.NullPointerException: message"
+ERROR_LINE_PATTERN = re.compile(
+    r"(?<![\w$.])(?P<type>(?:[a-zA-Z_][\w$]*\.)*[A-Z]\w*"
+    r"(?:Error|Exception|Exit|Interrupt|Warning))\b"
+    r"(?::[ \t]*(?P<message>.*)$)?",
+    re.MULTILINE
+)
+PYTHON_TRACEBACK = "traceback (most recent call last)"
+
+# Normalization rules, applied in order
+NORMALIZERS: List[Tuple[re.Pattern, str]] = [
+    # Inline stack frames ("... at App.js:12:5")
+    (re.compile(r"\s+at\s+\S+:\d+.*$"), ""),
+    (re.compile(r"(?:[a-zA-Z]:)?(?:[\\/][\w.\-]+){2,}"), "<path>"),
+    (re.compile(r"0x[0-9a-fA-F]+"), "<addr>"),
+    (re.compile(r"'[^']*'|\"[^\"]*\"|`[^`]*`"), "<id>"),
+    (re.compile(r"[\w$.\[\]()]+(?= is not (?:a function|defined|iterable|a constructor))"), "<id>"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "<n>"),
+    (re.compile(r"\s+"), " "),
+]
+
+LANGUAGE_HINTS = [
+    ('python', re.compile(r"traceback \(most recent call last\)|file \".*\.py\"", re.IGNORECASE)),
+    ('java', re.compile(r"\bjava\.\w+\.|exception in thread", re.IGNORECASE)),
+    ('javascript', re.compile(r"\.m?js:\d+|uncaught \w+error|is not a function|is not defined", re.IGNORECASE)),
+    ('c++', re.compile(r"\bstd::|segmentation fault|undefined reference to", re.IGNORECASE)),
+]
+
+
+@dataclass
+class ErrorSignature:
+    language: Optional[str]
+    exception_type: str
+    normalized_message: str
+    fingerprint: str
+
+    @property
+    def description(self) -> str:
+        message = f": {self.normalized_message}" if self.normalized_message else ""
+        return f"[{self.language or 'unknown'}] {self.exception_type}{message}"
+
+
+def normalize_error_message(text: str) -> str:
+    """Strip identifiers, paths, addresses and numbers from an error message."""
+    for pattern, replacement in NORMALIZERS:
+        text = pattern.sub(replacement, text)
+    return text.strip()
+
+
+def _candidate_texts(message: Message) -> Iterable[str]:
+    """Code blocks first (that is where pasted tracebacks live), then prose."""
+    yield from message.code_blocks
+    yield message.text
+
+
+def _find_error_line(text: str) -> Optional[re.Match]:
+    """Find the error line that best describes the failure.
+
+    Python tracebacks print the error last; Java and JavaScript print it
+    first, followed by stack frames.
+    """
+    matches = list(ERROR_LINE_PATTERN.finditer(text))
+    if not matches:
+        return None
+    if PYTHON_TRACEBACK in text.lower():
+        return matches[-1]
+    return matches[0]
+
+
+def _infer_language(text: str) -> Optional[str]:
+    for language, pattern in LANGUAGE_HINTS:
+        if pattern.search(text):
+            return language
+    return None
+
+
+def extract_error_signature(message: Message,
+                            language: Optional[str] = None
+                            ) -> Optional[ErrorSignature]:
+    """Extract a fingerprinted error signature from a message, if it has one."""
+    for text in _candidate_texts(message):
+        match = _find_error_line(text)
+        if match is None:
+            continue
+
+        # java.lang.NullPointerException -> NullPointerException
+        exception_type = match.group('type').rsplit('.', 1)[-1]
+        normalized = normalize_error_message(match.group('message') or '')
+        language = language or _infer_language(text)
+
+        key = f"{language or ''}|{exception_type}|{normalized}"
+        return ErrorSignature(
+            language=language,
+            exception_type=exception_type,
+            normalized_message=normalized,
+            fingerprint=hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+        )
+    return None
+
+
+class ErrorAnswerCache:
+    """Vetted answers for recurring errors, keyed by fingerprint."""
+
+    def __init__(self,
+                 redis_pool,
+                 answer_ttl: Optional[int] = None,
+                 stats_ttl: int = 30 * 86400,
+                 miss_window_days: int = 7):
+        """
+        Args:
+            redis_pool: Redis connection pool
+            answer_ttl: Seconds a vetted answer is kept (None: forever)
+            stats_ttl: Seconds hit/miss stats and unanswered signatures are
+                kept after the error was last seen
+            miss_window_days: Days of misses ranked by top_unanswered; each
+                day's counts expire after this window
+        """
+        self.redis = redis_pool
+        self.answer_ttl = answer_ttl
+        self.stats_ttl = stats_ttl
+        self.miss_window_days = miss_window_days
+
+    def _miss_keys(self) -> List[str]:
+        """Daily miss counters in the window, today first."""
+        today = int(time.time() // 86400)
+        return [
+            f'errors:misses:{day}'
+            for day in range(today, today - self.miss_window_days, -1)
+        ]
+
+    async def lookup(self, signature: ErrorSignature) -> Optional[str]:
+        """Get the vetted answer for an error and record a hit or miss."""
+        fp = signature.fingerprint
+        stats_key = f'errors:stats:{fp}'
+        try:
+            raw = await self.redis.get(f'errors:answer:{fp}')
+
+            # Bookkeeping goes out in one round trip
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.hincrby(stats_key, 'hits' if raw is not None else 'misses', 1)
+            pipe.expire(stats_key, self.stats_ttl)
+            if raw is None:
+                # Track unanswered errors per day so the most common recent
+                # ones can be vetted; old days expire on their own
+                misses_key = self._miss_keys()[0]
+                pipe.zincrby(misses_key, 1, fp)
+                pipe.expire(misses_key, self.miss_window_days * 86400)
+                pipe.set(
+                    f'errors:signature:{fp}',
+                    json.dumps(asdict(signature)),
+                    ex=self.stats_ttl
+                )
+            await pipe.execute()
+
+            if raw is not None:
+                return json.loads(raw)['answer']
+        except Exception as e:
+            logger.error(
+                "Error answer lookup failed",
+                error=str(e),
+                fingerprint=fp
+            )
+        return None
+
+    async def store_answer(self,
+                           signature: ErrorSignature,
+                           answer: str,
+                           vetted_by: Optional[str] = None):
+        """Store a vetted answer for an error signature."""
+        fp = signature.fingerprint
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.set(
+            f'errors:answer:{fp}',
+            json.dumps({
+                'answer': answer,
+                'signature': asdict(signature),
+                'vetted_by': vetted_by,
+                'vetted_at': time.time()
+            }),
+            ex=self.answer_ttl
+        )
+        for key in self._miss_keys():
+            pipe.zrem(key, fp)
+        pipe.delete(f'errors:signature:{fp}')
+        await pipe.execute()
+
+    async def get_stats(self, fingerprint: str) -> Dict[str, int]:
+        """Get hit/miss counts for a fingerprint."""
+        stats = await self.redis.hgetall(f'errors:stats:{fingerprint}')
+        return {
+            'hits': int(stats.get('hits', 0)),
+            'misses': int(stats.get('misses', 0))
+        }
+
+    async def top_unanswered(self, limit: int = 20) -> List[Dict]:
+        """Get the most frequently missed errors, as candidates for vetting."""
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.zunionstore('errors:misses:recent', self._miss_keys())
+        pipe.expire('errors:misses:recent', 60)
+        pipe.zrevrange('errors:misses:recent', 0, limit - 1, withscores=True)
+        entries = (await pipe.execute())[-1]
+        if not entries:
+            return []
+        signatures = await self.redis.mget(
+            [f'errors:signature:{fp}' for fp, _ in entries]
+        )
+        return [
+            {
+                'fingerprint': fp,
+                'misses': int(misses),
+                'signature': json.loads(raw) if raw else None
+            }
+            for (fp, misses), raw in zip(entries, signatures)
+        ]
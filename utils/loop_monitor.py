@@ -0,0 +1,112 @@
+"""
+Event loop lag monitor.
+
+A heartbeat coroutine measures how late the loop wakes it up, and a
+watchdog thread captures the loop thread's stack whenever the heartbeat
+stalls for longer than the threshold, which points at the code that
+blocked the loop.
+"""
+from typing import Dict, Optional
+import asyncio
+import sys
+import threading
+import time
+import traceback
+import structlog
+
+logger = structlog.get_logger()
+
+
+class EventLoopMonitor:
+    def __init__(self,
+                 interval: float = 0.25,
+                 threshold: float = 0.1,
+                 max_stack_depth: int = 30):
+        """
+        Args:
+            interval: Seconds between heartbeats
+            threshold: Lag in seconds that counts as the loop being blocked
+            max_stack_depth: Number of frames to record for a blocked loop
+        """
+        self.interval = interval
+        self.threshold = threshold
+        self.max_stack_depth = max_stack_depth
+
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.blocked_count = 0
+
+        self._last_beat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        """Start the heartbeat task and the watchdog thread."""
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._thread = threading.Thread(
+            target=self._watchdog,
+            name="loop-monitor",
+            daemon=True
+        )
+        self._thread.start()
+
+    async def stop(self):
+        """Stop monitoring."""
+        self._stopped.set()
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        if self._thread:
+            self._thread.join(timeout=self.interval * 2)
+
+    async def _heartbeat(self):
+        """Measure how late the loop resumes a fixed sleep."""
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._last_beat = now
+
+            lag = max(0.0, now - started - self.interval)
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            if lag >= self.threshold:
+                logger.warning("Event loop lag", lag_ms=round(lag * 1000, 1))
+
+    def _watchdog(self):
+        """Capture the loop thread's stack when the heartbeat stalls."""
+        stall_limit = self.interval + self.threshold
+        reported_beat = None
+
+        while not self._stopped.wait(self.threshold / 2):
+            beat = self._last_beat
+            stalled_for = time.monotonic() - beat
+            if stalled_for < stall_limit or beat == reported_beat:
+                continue
+
+            # Report each stall once, while the loop is still blocked
+            reported_beat = beat
+            self.blocked_count += 1
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = (
+                traceback.format_stack(frame, limit=self.max_stack_depth)
+                if frame is not None else []
+            )
+            logger.warning(
+                "Event loop blocked",
+                blocked_ms=round(stalled_for * 1000, 1),
+                stack=''.join(stack)
+            )
+
+    def stats(self) -> Dict[str, float]:
+        """Get current lag statistics."""
+        return {
+            'last_lag_ms': self.last_lag * 1000,
+            'max_lag_ms': self.max_lag * 1000,
+            'blocked_count': self.blocked_count
+        }
@@ -0,0 +1,236 @@
+"""
+Near-duplicate detection with MinHash signatures and a time-windowed LSH index.
+
+Copy-paste spam campaigns post the same text, lightly edited, from many
+accounts. Each message's word shingles are reduced to a MinHash signature
+and banded into an in-memory LSH index that only covers the last `window`
+seconds, so a lookup is a few dict probes. The index is mirrored to Redis
+in the background, so restarts and other instances share it.
+"""
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+import asyncio
+import hashlib
+import itertools
+import json
+import struct
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+import structlog
+from bot.message import Message
+
+logger = structlog.get_logger()
+
+REDIS_KEY = 'moderation:signatures'
+
+
+def shingles(tokens: Sequence[str], size: int = 2) -> Set[bytes]:
+    """The overlapping `size`-word windows of a token list."""
+    if len(tokens) <= size:
+        return {' '.join(tokens).encode('utf-8')}
+    return {
+        ' '.join(tokens[i:i + size]).encode('utf-8')
+        for i in range(len(tokens) - size + 1)
+    }
+
+
+class MinHasher:
+    """MinHash with one SHAKE-128 digest per shingle.
+
+    Each 32-bit slice of the digest acts as an independent hash function,
+    and the per-slice minimum is taken column-wise in C, which keeps a
+    signature well under a millisecond without numpy.
+    """
+
+    def __init__(self, num_perm: int = 64):
+        self.num_perm = num_perm
+        self._unpack = struct.Struct(f"<{num_perm}I").unpack
+
+    def signature(self, shingle_set: Iterable[bytes]) -> Tuple[int, ...]:
+        digest_size = self.num_perm * 4
+        rows = [
+            self._unpack(hashlib.shake_128(shingle).digest(digest_size))
+            for shingle in shingle_set
+        ]
+        return tuple(map(min, zip(*rows)))
+
+
+def similarity(first: Sequence[int], second: Sequence[int]) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures."""
+    return sum(a == b for a, b in zip(first, second)) / len(first)
+
+
+@dataclass
+class SignatureEntry:
+    entry_id: str
+    user_id: str
+    timestamp: float
+    signature: Tuple[int, ...]
+
+
+@dataclass
+class DuplicateCluster:
+    """Recent messages similar to the one being checked (including it)."""
+    size: int
+    users: Set[str] = field(default_factory=set)
+    similarity: float = 0.0
+
+
+class NearDuplicateIndex:
+    def __init__(self,
+                 redis_pool=None,
+                 window: int = 3600,
+                 threshold: float = 0.6,
+                 min_users: int = 5,
+                 num_perm: int = 64,
+                 bands: int = 16,
+                 shingle_size: int = 2,
+                 min_tokens: int = 6,
+                 max_candidates: int = 100,
+                 sync_interval: float = 5.0):
+        """
+        Args:
+            redis_pool: Redis connection pool; None keeps the index local
+            window: Seconds a message stays in the index
+            threshold: Estimated Jaccard similarity that counts as a duplicate
+            min_users: Distinct users a cluster needs before it is flagged
+            num_perm: MinHash signature length
+            bands: LSH bands (num_perm / bands rows each); more bands find
+                less similar candidates
+            shingle_size: Words per shingle
+            min_tokens: Shorter messages ("thanks!") are never checked
+            max_candidates: Most candidates compared per lookup
+            sync_interval: Seconds between Redis syncs
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.redis = redis_pool
+        self.window = window
+        self.threshold = threshold
+        self.min_users = min_users
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.min_tokens = min_tokens
+        self.max_candidates = max_candidates
+        self.sync_interval = sync_interval
+        self.hasher = MinHasher(num_perm)
+
+        # Roughly oldest first; entries synced from Redis may be older
+        self.entries: 'OrderedDict[str, SignatureEntry]' = OrderedDict()
+        self.buckets: Dict[Tuple[int, int], Set[str]] = {}
+        self._unsynced: List[SignatureEntry] = []
+        self._synced_until = 0.0
+
+    def _band_keys(self, signature: Tuple[int, ...]) -> List[Tuple[int, int]]:
+        return [
+            (band, hash(signature[band * self.rows:(band + 1) * self.rows]))
+            for band in range(self.bands)
+        ]
+
+    def _add(self, entry: SignatureEntry):
+        self.entries[entry.entry_id] = entry
+        for key in self._band_keys(entry.signature):
+            self.buckets.setdefault(key, set()).add(entry.entry_id)
+
+    def _evict(self, now: float):
+        cutoff = now - self.window
+        while self.entries:
+            entry = next(iter(self.entries.values()))
+            if entry.timestamp >= cutoff:
+                break
+            self.entries.popitem(last=False)
+            for key in self._band_keys(entry.signature):
+                bucket = self.buckets.get(key)
+                if bucket is not None:
+                    bucket.discard(entry.entry_id)
+                    if not bucket:
+                        del self.buckets[key]
+
+    def check(self,
+              message: Message,
+              user_id: Optional[str] = None,
+              now: Optional[float] = None) -> Optional[DuplicateCluster]:
+        """Index a message; return its cluster if enough users posted it."""
+        tokens = message.tokens
+        if len(tokens) < self.min_tokens:
+            return None
+
+        now = now or time.time()
+        user_id = user_id or message.user_id or ''
+        entry_id = message.item_id or f"{user_id}:{now}"
+        self._evict(now)
+
+        signature = self.hasher.signature(shingles(tokens, self.shingle_size))
+        candidates: Set[str] = set()
+        for key in self._band_keys(signature):
+            candidates.update(self.buckets.get(key, ()))
+        candidates.discard(entry_id)
+
+        cluster = DuplicateCluster(size=1, users={user_id})
+        cutoff = now - self.window
+        for candidate_id in itertools.islice(candidates, self.max_candidates):
+            entry = self.entries[candidate_id]
+            if entry.timestamp < cutoff:
+                continue
+            score = similarity(signature, entry.signature)
+            if score >= self.threshold:
+                cluster.size += 1
+                cluster.users.add(entry.user_id)
+                cluster.similarity = max(cluster.similarity, score)
+
+        if entry_id not in self.entries:
+            entry = SignatureEntry(entry_id, user_id, now, signature)
+            self._add(entry)
+            if self.redis is not None:
+                self._unsynced.append(entry)
+
+        if len(cluster.users) >= self.min_users:
+            return cluster
+        return None
+
+    async def sync(self):
+        """Push new local signatures to Redis and pull other instances' ones."""
+        now = time.time()
+        batch, self._unsynced = self._unsynced, []
+        # Re-read a little history so late writes from other instances
+        # are not missed
+        since = max(self._synced_until - 60, now - self.window)
+
+        pipe = self.redis.pipeline(transaction=False)
+        if batch:
+            pipe.zadd(REDIS_KEY, {
+                json.dumps([e.entry_id, e.user_id, e.timestamp, list(e.signature)]):
+                    e.timestamp
+                for e in batch
+            })
+        pipe.zremrangebyscore(REDIS_KEY, '-inf', now - self.window)
+        pipe.zrangebyscore(REDIS_KEY, since, '+inf')
+        try:
+            results = await pipe.execute()
+        except BaseException:
+            self._unsynced[:0] = batch
+            raise
+
+        loaded = 0
+        for raw in results[-1]:
+            entry_id, user_id, timestamp, signature = json.loads(raw)
+            if entry_id not in self.entries and len(signature) == self.hasher.num_perm:
+                self._add(SignatureEntry(entry_id, user_id, timestamp, tuple(signature)))
+                loaded += 1
+        self._synced_until = now
+        if loaded:
+            logger.debug("Loaded message signatures", count=loaded)
+
+    async def run(self):
+        """Sync with Redis periodically until cancelled."""
+        if self.redis is None:
+            return
+        while True:
+            try:
+                await self.sync()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Error syncing message signatures", error=str(e))
+            await asyncio.sleep(self.sync_interval)
@@ -2,7 +2,7 @@
 Redis client utilities and connection management.
 """
 from typing import Optional
-import aioredis
+from redis import asyncio as aioredis
 import structlog
 
 logger = structlog.get_logger()
@@ -10,7 +10,7 @@ logger = structlog.get_logger()
 async def init_redis_pool(redis_url: str) -> aioredis.Redis:
     """Initialize Redis connection pool."""
     try:
-        redis = await aioredis.from_url(
+        redis = aioredis.from_url(
             redis_url,
             encoding='utf-8',
             decode_responses=True
@@ -1,21 +1,29 @@
 """
 Sentiment analysis utilities using VADER.
 """
-from typing import Dict, Tuple
+from typing import Dict, Tuple, Union
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+from bot.message import Message
 
 class SentimentAnalyzer:
     def __init__(self):
         self.analyzer = SentimentIntensityAnalyzer()
         
-    def analyze(self, text: str) -> Tuple[float, str]:
+    def analyze(self, text: Union[str, Message]) -> Tuple[float, str]:
         """
         Analyze text sentiment and return score and category.
         
+        Messages cache their result, so each one is scored only once.
+        
         Returns:
             Tuple of (compound_score, category)
             where category is one of: positive, negative, neutral
         """
+        if isinstance(text, Message):
+            if text.sentiment is None:
+                text.sentiment = self.analyze(text.text)
+            return text.sentiment
+            
         scores = self.analyzer.polarity_scores(text)
         
         # Get compound score
@@ -0,0 +1,73 @@
+"""
+Latency SLO tracking.
+"""
+from typing import Dict, Optional
+from collections import deque
+import structlog
+
+logger = structlog.get_logger()
+
+
+class LatencySLO:
+    def __init__(self,
+                 name: str,
+                 target: float,
+                 objective: float = 0.99,
+                 window: int = 1000):
+        """
+        Args:
+            name: Name used in logs and metric keys
+            target: Latency target in seconds
+            objective: Fraction of events that must meet the target
+            window: Number of recent events used for percentiles
+        """
+        self.name = name
+        self.target = target
+        self.objective = objective
+        self.total = 0
+        self.breaches = 0
+        self.recent: deque = deque(maxlen=window)
+
+    def record(self, latency: float, **context) -> bool:
+        """Record one event; returns False if it missed the target."""
+        self.total += 1
+        self.recent.append(latency)
+        if latency <= self.target:
+            return True
+
+        self.breaches += 1
+        logger.warning(
+            "SLO target missed",
+            slo=self.name,
+            latency_ms=round(latency * 1000, 1),
+            target_ms=round(self.target * 1000, 1),
+            **context
+        )
+        return False
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if not self.recent:
+            return None
+        ordered = sorted(self.recent)
+        index = min(len(ordered) - 1, int(pct / 100 * len(ordered)))
+        return ordered[index]
+
+    @property
+    def compliance(self) -> float:
+        """Fraction of all recorded events that met the target."""
+        if not self.total:
+            return 1.0
+        return 1 - self.breaches / self.total
+
+    def stats(self) -> Dict:
+        return {
+            'name': self.name,
+            'target_ms': self.target * 1000,
+            'objective': self.objective,
+            'total': self.total,
+            'breaches': self.breaches,
+            'compliance': self.compliance,
+            'meeting_objective': self.compliance >= self.objective,
+            'p50_ms': (self.percentile(50) or 0) * 1000,
+            'p99_ms': (self.percentile(99) or 0) * 1000,
+        }
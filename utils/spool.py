@@ -0,0 +1,305 @@
+"""
+Durable local spool for in-flight work.
+
+An append-only, memory-mapped log of records and acknowledgements. Writes
+land in the page cache as plain memory copies, so they survive a process
+crash without a syscall per event; flush() forces them to disk. On open,
+the log is replayed and every record that was never acknowledged is
+returned so the caller can resume it. Compaction rewrites the file with
+only the live records.
+
+append() and ack() belong to the event loop thread. maintain() runs the
+slow parts (msync, writing and fsyncing the compacted file) in worker
+threads; a lock keeps them from racing a remap of the file.
+"""
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import asyncio
+import json
+import mmap
+import os
+import struct
+import threading
+import zlib
+import structlog
+
+logger = structlog.get_logger()
+
+# length (payload bytes), crc32, kind, record id
+HEADER = struct.Struct('<IIBQ')
+KIND_PUT = 1
+KIND_ACK = 2
+EMPTY_HEADER = b'\0' * HEADER.size
+
+DEFAULT_INITIAL_SIZE = 1 << 20  # 1 MiB
+
+
+def _encode(stream: str, data: Any) -> bytes:
+    return json.dumps([stream, data], separators=(',', ':')).encode('utf-8')
+
+
+def _sync(file, file_map: mmap.mmap):
+    """Write a mapped file's dirty pages to disk.
+
+    Pages written through a shared mapping sit in the page cache, so
+    fsync writes them back too, and unlike mmap.flush() (msync) it
+    releases the GIL while it waits on the disk. Windows needs the msync.
+    """
+    if os.name == 'nt':
+        file_map.flush()
+    else:
+        os.fsync(file.fileno())
+
+
+class Spool:
+    def __init__(self,
+                 path: str,
+                 initial_size: int = DEFAULT_INITIAL_SIZE,
+                 compact_ratio: float = 0.5):
+        """
+        Args:
+            path: Spool file location
+            initial_size: Bytes preallocated for a new or compacted file
+            compact_ratio: Compact once dead bytes exceed this share of
+                the written log
+        """
+        self.path = path
+        self.initial_size = initial_size
+        self.compact_ratio = compact_ratio
+
+        self.pending: Dict[int, Tuple[str, Any]] = {}
+        self._sizes: Dict[int, int] = {}
+        self._live_bytes = 0
+        self._offset = 0
+        self._next_id = 1
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+        # Held while the map is flushed, replaced or closed
+        self._map_lock = threading.Lock()
+
+    def open(self) -> Dict[int, Tuple[str, Any]]:
+        """Open the spool and return unacknowledged records by id."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        mode = 'r+b' if os.path.exists(self.path) else 'w+b'
+        self._file = open(self.path, mode)
+        size = os.fstat(self._file.fileno()).st_size
+        if size < self.initial_size:
+            self._file.truncate(self.initial_size)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+
+        self._replay()
+        if self.pending:
+            logger.info(
+                "Spool replayed",
+                path=self.path,
+                pending=len(self.pending)
+            )
+        return dict(self.pending)
+
+    def _scan(self, buffer) -> Iterator[Tuple[int, int, int, bytes]]:
+        """Yield (end offset, kind, id, payload) for each valid record."""
+        offset = 0
+        limit = len(buffer)
+        while offset + HEADER.size <= limit:
+            length, crc, kind, record_id = HEADER.unpack_from(buffer, offset)
+            if kind not in (KIND_PUT, KIND_ACK):
+                break  # Preallocated zeroes: end of log
+            start = offset + HEADER.size
+            end = start + length
+            if end > limit:
+                break
+            payload = bytes(buffer[start:end])
+            if zlib.crc32(payload, kind ^ record_id) != crc:
+                break  # Torn write from a crash: discard the tail
+            yield end, kind, record_id, payload
+            offset = end
+
+    def _replay(self):
+        self.pending.clear()
+        self._sizes.clear()
+        self._offset = 0
+
+        for end, kind, record_id, payload in self._scan(self._map):
+            self._offset = end
+            self._next_id = max(self._next_id, record_id + 1)
+            if kind == KIND_PUT:
+                stream, data = json.loads(payload)
+                self.pending[record_id] = (stream, data)
+                self._sizes[record_id] = HEADER.size + len(payload)
+            else:
+                self.pending.pop(record_id, None)
+                self._sizes.pop(record_id, None)
+        self._live_bytes = sum(self._sizes.values())
+
+        # Clear anything after the last valid record (e.g. a torn write)
+        # so it cannot be mistaken for data later
+        tail = min(len(self._map) - self._offset, HEADER.size)
+        self._map[self._offset:self._offset + tail] = EMPTY_HEADER[:tail]
+
+    def _write(self, kind: int, record_id: int, payload: bytes):
+        size = HEADER.size + len(payload)
+        # Keep a zeroed header after every record as the end marker
+        self._ensure_capacity(self._offset + size + HEADER.size)
+
+        crc = zlib.crc32(payload, kind ^ record_id)
+        start = self._offset + HEADER.size
+        end = start + len(payload)
+        # Payload first, header last: a crash mid-write leaves no valid header
+        self._map[start:end] = payload
+        self._map[end:end + HEADER.size] = EMPTY_HEADER
+        self._map[self._offset:start] = HEADER.pack(len(payload), crc, kind, record_id)
+        self._offset = end
+
+    def _ensure_capacity(self, needed: int):
+        if needed <= len(self._map):
+            return
+        new_size = len(self._map)
+        while new_size < needed:
+            new_size *= 2
+        with self._map_lock:
+            self._map.flush()
+            self._map.close()
+            self._file.truncate(new_size)
+            self._map = mmap.mmap(self._file.fileno(), 0)
+
+    def append(self, stream: str, data: Any) -> int:
+        """Durably record an item; returns its id for ack()."""
+        record_id = self._next_id
+        self._next_id += 1
+        payload = _encode(stream, data)
+        self._write(KIND_PUT, record_id, payload)
+        self.pending[record_id] = (stream, data)
+        self._sizes[record_id] = HEADER.size + len(payload)
+        self._live_bytes += self._sizes[record_id]
+        return record_id
+
+    def ack(self, record_id: Optional[int]):
+        """Mark an item as done so it is not replayed."""
+        if record_id is None or record_id not in self.pending:
+            return
+        del self.pending[record_id]
+        self._live_bytes -= self._sizes.pop(record_id)
+        self._write(KIND_ACK, record_id, b'')
+
+    def pending_for(self, stream: str) -> List[Tuple[int, Any]]:
+        """Unacknowledged records for one stream, oldest first."""
+        return sorted(
+            (record_id, data)
+            for record_id, (name, data) in self.pending.items()
+            if name == stream
+        )
+
+    def should_compact(self) -> bool:
+        dead = self._offset - self._live_bytes
+        return (self._offset > self.initial_size // 2 and
+                dead > self._offset * self.compact_ratio)
+
+    def compact(self):
+        """Rewrite the spool with only unacknowledged records."""
+        live = list(self.pending.items())
+        self._finish_compaction(live, *self._write_compacted(live))
+
+    async def maintain(self):
+        """Flush to disk, then compact if mostly acknowledged.
+
+        The disk sync and writing the compacted file run in worker
+        threads, so the event loop keeps appending and acking meanwhile;
+        only the final swap of files runs on the loop.
+        """
+        await asyncio.to_thread(self.flush)
+        if not self.should_compact():
+            return
+        live = list(self.pending.items())
+        tmp_path, end = await asyncio.to_thread(self._write_compacted, live)
+        if self._map is not None:
+            self._finish_compaction(live, tmp_path, end)
+
+    def _write_compacted(self,
+                         live: List[Tuple[int, Tuple[str, Any]]]) -> Tuple[str, int]:
+        """Write a snapshot of live records to a new file; thread-safe.
+
+        Returns the file's path and the end offset of its last record.
+        """
+        tmp_path = f"{self.path}.compact"
+        encoded = [
+            (record_id, _encode(stream, data))
+            for record_id, (stream, data) in sorted(live)
+        ]
+        needed = sum(HEADER.size + len(p) for _, p in encoded) + HEADER.size
+        size = max(self.initial_size, needed)
+
+        with open(tmp_path, 'w+b') as f:
+            f.truncate(size)
+            with mmap.mmap(f.fileno(), 0) as tmp_map:
+                offset = 0
+                for record_id, payload in encoded:
+                    tmp_map[offset:offset + HEADER.size] = HEADER.pack(
+                        len(payload),
+                        zlib.crc32(payload, KIND_PUT ^ record_id),
+                        KIND_PUT,
+                        record_id
+                    )
+                    offset += HEADER.size
+                    tmp_map[offset:offset + len(payload)] = payload
+                    offset += len(payload)
+                _sync(f, tmp_map)
+        return tmp_path, offset
+
+    def _finish_compaction(self,
+                           live: List[Tuple[int, Tuple[str, Any]]],
+                           tmp_path: str,
+                           end: int):
+        """Swap in a compacted file, carrying over later appends and acks.
+
+        The carried records are written before the rename, so a crash at
+        any point leaves one complete file in place.
+        """
+        previous = self._offset
+        old_file, old_map = self._file, self._map
+        with self._map_lock:
+            self._file = open(tmp_path, 'r+b')
+            self._map = mmap.mmap(self._file.fileno(), 0)
+        self._offset = end
+
+        snapshot = {record_id for record_id, _ in live}
+        for record_id in sorted(snapshot - self.pending.keys()):
+            self._write(KIND_ACK, record_id, b'')
+        for record_id in sorted(self.pending.keys() - snapshot):
+            stream, data = self.pending[record_id]
+            self._write(KIND_PUT, record_id, _encode(stream, data))
+
+        with self._map_lock:
+            old_map.close()
+            old_file.close()
+            # Windows cannot replace a file that is still open
+            self._map.close()
+            self._file.close()
+            os.replace(tmp_path, self.path)
+            self._file = open(self.path, 'r+b')
+            self._map = mmap.mmap(self._file.fileno(), 0)
+
+        logger.info(
+            "Spool compacted",
+            path=self.path,
+            before_bytes=previous,
+            after_bytes=self._offset,
+            pending=len(self.pending)
+        )
+
+    def flush(self):
+        """Force written records to disk."""
+        with self._map_lock:
+            if self._map is not None:
+                _sync(self._file, self._map)
+
+    def close(self):
+        with self._map_lock:
+            if self._map is not None:
+                self._map.flush()
+                self._map.close()
+                self._map = None
+            if self._file is not None:
+                self._file.close()
+                self._file = None
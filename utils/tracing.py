@@ -0,0 +1,251 @@
+"""
+Lightweight per-message tracing with context-var propagated trace IDs.
+
+Spans are recorded in memory for every trace and only exported when the
+trace is sampled or slower than the slow threshold. Exported traces use the
+OTLP JSON span layout so they can be forwarded to a collector as-is.
+"""
+from typing import Any, Callable, Dict, List, Optional
+import contextlib
+import functools
+import os
+import random
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+import aiohttp
+import structlog
+
+logger = structlog.get_logger()
+
+
+@dataclass
+class Span:
+    name: str
+    span_id: str
+    parent_id: Optional[str]
+    start_ns: int
+    end_ns: int = 0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+
+@dataclass
+class Trace:
+    trace_id: str
+    name: str
+    start_ns: int
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    spans: List[Span] = field(default_factory=list)
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar('trace', default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar('span', default=None)
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+def current_trace_id() -> Optional[str]:
+    """Get the trace ID of the message being processed, if any."""
+    trace = _current_trace.get()
+    return trace.trace_id if trace else None
+
+
+@contextlib.contextmanager
+def span(name: str, **attributes: Any):
+    """Time a block as a child span of the current trace.
+
+    Does nothing when called outside a trace.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+
+    parent = _current_span.get()
+    current = Span(
+        name=name,
+        span_id=_new_id(64),
+        parent_id=parent.span_id if parent else None,
+        start_ns=time.time_ns(),
+        attributes=attributes
+    )
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = repr(e)
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _current_span.reset(token)
+        trace.spans.append(current)
+
+
+def traced(name: str) -> Callable:
+    """Decorator that wraps an async function in a span."""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class Tracer:
+    def __init__(self,
+                 sample_rate: float = 0.01,
+                 slow_threshold: float = 5.0,
+                 service_name: str = "simpi"):
+        """
+        Args:
+            sample_rate: Fraction of traces exported regardless of duration
+            slow_threshold: Traces slower than this (seconds) are always exported
+            service_name: Reported as the OTLP service.name resource attribute
+        """
+        self.sample_rate = sample_rate
+        self.slow_threshold_ns = int(slow_threshold * 1e9)
+        self.service_name = service_name
+
+    @contextlib.contextmanager
+    def trace(self, name: str, **attributes: Any):
+        """Start a trace for one incoming item."""
+        current = Trace(
+            trace_id=_new_id(128),
+            name=name,
+            start_ns=time.time_ns(),
+            attributes=attributes
+        )
+        trace_token = _current_trace.set(current)
+        span_token = _current_span.set(None)
+        error = None
+        try:
+            with structlog.contextvars.bound_contextvars(
+                trace_id=current.trace_id
+            ):
+                yield current
+        except BaseException as e:
+            error = repr(e)
+            raise
+        finally:
+            _current_span.reset(span_token)
+            _current_trace.reset(trace_token)
+            self._finish(current, error)
+
+    def _finish(self, trace: Trace, error: Optional[str]):
+        """Export the trace if it was sampled or slow."""
+        end_ns = time.time_ns()
+        slow = end_ns - trace.start_ns >= self.slow_threshold_ns
+        if not (slow or error or random.random() < self.sample_rate):
+            return
+
+        root = Span(
+            name=trace.name,
+            span_id=_new_id(64),
+            parent_id=None,
+            start_ns=trace.start_ns,
+            end_ns=end_ns,
+            attributes=trace.attributes,
+            error=error
+        )
+        for child in trace.spans:
+            if child.parent_id is None:
+                child.parent_id = root.span_id
+
+        logger.info(
+            "trace",
+            trace_id=trace.trace_id,
+            duration_ms=root.duration_ms,
+            slow=slow,
+            spans={
+                s.name: round(s.duration_ms, 3) for s in trace.spans
+            },
+            otlp=self.to_otlp(trace.trace_id, [root] + trace.spans)
+        )
+
+    def to_otlp(self, trace_id: str, spans: List[Span]) -> Dict:
+        """Render spans as an OTLP/JSON ExportTraceServiceRequest."""
+        return {
+            "resourceSpans": [{
+                "resource": {
+                    "attributes": [
+                        _otlp_attribute("service.name", self.service_name),
+                        _otlp_attribute("process.pid", os.getpid())
+                    ]
+                },
+                "scopeSpans": [{
+                    "scope": {"name": "simpi.tracing"},
+                    "spans": [
+                        {
+                            "traceId": trace_id,
+                            "spanId": s.span_id,
+                            "parentSpanId": s.parent_id or "",
+                            "name": s.name,
+                            "kind": 1,
+                            "startTimeUnixNano": str(s.start_ns),
+                            "endTimeUnixNano": str(s.end_ns),
+                            "attributes": [
+                                _otlp_attribute(k, v)
+                                for k, v in s.attributes.items()
+                            ],
+                            "status": (
+                                {"code": 2, "message": s.error}
+                                if s.error else {"code": 1}
+                            )
+                        }
+                        for s in spans
+                    ]
+                }]
+            }]
+        }
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+def aiohttp_trace_config() -> aiohttp.TraceConfig:
+    """Create an aiohttp TraceConfig that records outbound requests as spans."""
+    async def on_request_start(session, ctx, params):
+        ctx.span = span(
+            "http.request",
+            **{
+                "http.method": params.method,
+                "http.host": params.url.host or ""
+            }
+        )
+        ctx.current = ctx.span.__enter__()
+
+    async def on_request_end(session, ctx, params):
+        if getattr(ctx, 'span', None) is None:
+            return
+        if ctx.current is not None:
+            ctx.current.attributes["http.status_code"] = params.response.status
+        ctx.span.__exit__(None, None, None)
+
+    async def on_request_exception(session, ctx, params):
+        if getattr(ctx, 'span', None) is None:
+            return
+        exc = params.exception
+        ctx.span.__exit__(type(exc), exc, exc.__traceback__)
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_request_exception.append(on_request_exception)
+    return trace_config
@@ -0,0 +1,75 @@
+"""
+Venice (via OpenRouter) chat completion client.
+"""
+from typing import Any, Dict, List, Optional
+import aiohttp
+import structlog
+from utils.backoff import exponential_backoff
+from utils.concurrency import AdaptiveConcurrencyLimiter
+from utils.tracing import aiohttp_trace_config, traced
+
+logger = structlog.get_logger()
+
+
+class ModelError(Exception):
+    """Raised when the model API returns an error response."""
+
+    def __init__(self, status: int, message: str = ""):
+        super().__init__(f"Model API error {status}: {message}")
+        self.status = status
+
+
+def _retryable(error: Exception) -> bool:
+    # Overloads are retried by the caller's limiter, outside its slot, so
+    # each one is seen and cuts the concurrency limit
+    return not AdaptiveConcurrencyLimiter.is_overload(error)
+
+
+class VeniceClient:
+    def __init__(self,
+                 api_key: str,
+                 base_url: str = "https://openrouter.ai/api/v1",
+                 model: str = "cognitivecomputations/dolphin-mistral-24b-venice-edition:free",
+                 timeout: float = 30):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.model = model
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared HTTP session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=self.timeout,
+                trace_configs=[aiohttp_trace_config()],
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json"
+                }
+            )
+        return self._session
+
+    @traced("model.complete")
+    @exponential_backoff(max_retries=3, retry_if=_retryable)
+    async def complete(self,
+                       messages: List[Dict[str, str]],
+                       **params: Any) -> str:
+        """Send a chat completion request and return the reply text."""
+        session = await self._get_session()
+        payload = {"model": self.model, "messages": messages, **params}
+
+        async with session.post(
+            f"{self.base_url}/chat/completions",
+            json=payload
+        ) as response:
+            if response.status != 200:
+                raise ModelError(response.status, await response.text())
+            data = await response.json()
+
+        return data["choices"][0]["message"]["content"]
+
+    async def close(self):
+        """Close the underlying HTTP session."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
@@ -5,6 +5,7 @@ import aiohttp
 import json
 import structlog
 from typing import Optional, Dict, Any
+from utils.tracing import aiohttp_trace_config
 
 logger = structlog.get_logger()
 
@@ -33,7 +34,9 @@ class WebhookNotifier:
                 }]
             }
             
-            async with aiohttp.ClientSession() as session:
+            async with aiohttp.ClientSession(
+                trace_configs=[aiohttp_trace_config()]
+            ) as session:
                 async with session.post(
                     self.slack_url,
                     json=payload
@@ -68,7 +71,9 @@ class WebhookNotifier:
                 "embeds": [embed]
             }
             
-            async with aiohttp.ClientSession() as session:
+            async with aiohttp.ClientSession(
+                trace_configs=[aiohttp_trace_config()]
+            ) as session:
                 async with session.post(
                     self.discord_url,
                     json=payload